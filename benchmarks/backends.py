@@ -0,0 +1,83 @@
+"""
+Benchmark: thread vs process tiling backends.
+
+Times blur and the fused adjustments on both backends over a range of image
+sizes and reports the size from which processes beat threads. Images below
+performance.tile_min_pixels run in one call on either backend, so sizes
+start above it.
+
+Run from the repository root:
+    python -m benchmarks.backends [--sizes 4 16 64] [--repeat 3]
+"""
+
+import argparse
+import time
+from functools import partial
+import numpy as np
+from operations.adjustments import adjust_tile, adjustment_stages
+from operations.filters import blur_kernel, blur_tile
+from operations.tiling import get_process_executor, process_tiled, worker_count
+
+
+BLUR_SIZE, BLUR_SIGMA = blur_kernel(8)
+
+# The tiled calls behind apply_blur(image, 8) and apply_adjustments(...),
+# with the backend passed explicitly: (tile function, halo)
+OPERATIONS = {
+    "blur": (partial(blur_tile, k_size=BLUR_SIZE, sigma=BLUR_SIGMA), BLUR_SIZE // 2),
+    "adjustments": (partial(adjust_tile, stages=adjustment_stages(20, 30, 40)), 0),
+}
+
+
+def make_image(megapixels):
+    """Random RGB image of roughly the given size, 4:3."""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(megapixels * 1e6 / width)
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def best_time(operation, image, backend, repeat):
+    """Fastest of repeat runs of a (tile function, halo) operation on image with the given backend."""
+    func, halo = operation
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process_tiled(image, func, halo=halo, backend=backend)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[4, 8, 16, 32, 64],
+                        help="image sizes in megapixels")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"workers: {worker_count()}")
+    # Start the worker processes outside the timings
+    get_process_executor().submit(int).result()
+
+    for name, operation in OPERATIONS.items():
+        print(f"\n{name}")
+        print(f"{'MP':>6} {'threads':>10} {'processes':>10}")
+        # Smallest size from which processes win at every larger size
+        crossover = None
+        for megapixels in args.sizes:
+            image = make_image(megapixels)
+            threads = best_time(operation, image, "threads", args.repeat)
+            processes = best_time(operation, image, "processes", args.repeat)
+            print(f"{megapixels:>6g} {threads * 1000:>8.1f}ms {processes * 1000:>8.1f}ms")
+            if processes >= threads:
+                crossover = None
+            elif crossover is None:
+                crossover = megapixels
+        if crossover is None:
+            print("processes never beat threads at these sizes")
+        else:
+            print(f"processes beat threads from {crossover:g} MP")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark: encode time versus file size for every encoder profile.
+
+Encodes an image in memory with each profile of settings.encoder.profiles
+for each format and prints a table, to help choose encoder.profile.
+
+Run from the repository root:
+    python -m benchmarks.encoders IMAGE [--formats png jpeg] [--repeat 3]
+"""
+
+import argparse
+import io
+import time
+from PIL import Image
+from config.config import settings
+from utils.file_io import encodable, encoder_options
+from utils.formatting import format_bytes
+from utils.image_converter import array_to_pil, pil_to_array
+
+
+def encode(pil_image, image_format, options):
+    """Encoded bytes of pil_image, converted for the format as save_atomic does."""
+    buffer = io.BytesIO()
+    encodable(pil_image, image_format).save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("image")
+    parser.add_argument("--formats", nargs="+", default=["png", "jpeg", "webp", "tiff"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Encode the working array, as saving from the editor does
+    with Image.open(args.image) as image:
+        pil_image = array_to_pil(pil_to_array(image))
+    print(f"{args.image}: {pil_image.width}x{pil_image.height}")
+    print(f"{'format':<8}{'profile':<12}{'time':>10}{'size':>12}")
+
+    for image_format in args.formats:
+        for profile in settings.encoder.profiles:
+            options = encoder_options(image_format, profile)
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                data = encode(pil_image, image_format.upper(), options)
+                best = min(best, time.perf_counter() - start)
+            print(f"{image_format:<8}{profile:<12}{best * 1000:>8.0f}ms{format_bytes(len(data)):>12}")
+
+
+if __name__ == "__main__":
+    main()
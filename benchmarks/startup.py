@@ -0,0 +1,77 @@
+"""
+Benchmark: start-up time of the editor against a target.
+
+Each phase is timed in a fresh interpreter, best of --repeat runs:
+window is what main.py imports before the window first paints, editor
+the import of the full application behind it. The Tk window itself is
+only created when a display is available. Exits with 1 if the time to
+first paint is over --target-ms.
+
+Run from the repository root:
+    python -m benchmarks.startup [--repeat 5] [--target-ms 150]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+PHASES = {
+    "settings": "from config.config import settings",
+    "window": "import tkinter; from config.config import settings",
+    "editor": "import core.app",
+}
+
+# Creates and paints a window as main.py does, then exits
+PAINT = """
+import tkinter as tk
+from config.config import settings
+root = tk.Tk()
+root.geometry(f"{settings.window.width}x{settings.window.height}")
+tk.Label(root, text="Loading...").place(relx=0.5, rely=0.5)
+root.update()
+root.destroy()
+"""
+
+
+def time_code(code, repeat):
+    """Best wall time of running code in a new interpreter, start-up included."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, cwd=os.getcwd())
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=150,
+                        help="longest acceptable time to first paint")
+    args = parser.parse_args()
+
+    baseline = time_code("pass", args.repeat)
+    print(f"{'interpreter':<12}{baseline * 1000:>8.0f}ms")
+    times = {name: time_code(code, args.repeat) for name, code in PHASES.items()}
+    for name, seconds in times.items():
+        print(f"{name:<12}{seconds * 1000:>8.0f}ms")
+
+    first_paint = times["window"]
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        first_paint = time_code(PAINT, args.repeat)
+        print(f"{'paint':<12}{first_paint * 1000:>8.0f}ms")
+    else:
+        print("no display: first paint measured without creating the window")
+
+    if first_paint * 1000 > args.target_ms:
+        print(f"first paint {first_paint * 1000:.0f}ms is over the {args.target_ms:g}ms target")
+        return 1
+    print(f"first paint {first_paint * 1000:.0f}ms is within the {args.target_ms:g}ms target")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Benchmark suite: operations, history and display scaling on synthetic images.
+
+Times every case on generated images of several sizes and records the
+best wall time, throughput (megapixels/s) and peak traced allocation
+(numpy and Python; OpenCV's internal buffers are not seen). Results are
+written as JSON and compared with a baseline file; a case slower than the
+baseline by more than --threshold is reported as a regression and makes
+the exit code 1. Needs no display.
+
+Run from the repository root:
+    python -m benchmarks.suite [--sizes 1 12 24] [--output results.json]
+                               [--baseline baseline.json] [--threshold 0.15]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import cv2
+import numpy as np
+from PIL import Image
+from core.history import Operation
+from core.image_handle import ImageHandle
+from core.image_manager import ImageManager
+from core.preview import make_proxy
+from operations.adjustments import compute_histogram
+from operations.filters import EdgeGradients
+from operations import registry
+from operations.tiling import worker_count
+from ui.display_pyramid import DisplayPyramid
+from utils.image_converter import array_to_pil, image_size, pil_to_array
+
+
+VIEW = (1600, 1000)  # canvas size assumed for the display cases
+TILE = 256
+
+
+def operation_cases(width, height):
+    """(case, operation name, params) for every registered operation."""
+    return [
+        ("grayscale", "grayscale", {}),
+        ("blur", "blur", {"intensity": 5}),
+        ("blur_large", "blur", {"intensity": 60}),
+        ("edges", "edges", {}),
+        ("brightness", "brightness", {"value": 20}),
+        ("contrast", "contrast", {"value": 20}),
+        ("saturation", "saturation", {"value": 30}),
+        ("adjust", "adjust", {"brightness": 10, "contrast": 10, "saturation": 10}),
+        ("levels", "levels", {"black_red": 10, "black_green": 12, "black_blue": 8, "white_red": 240}),
+        ("auto_levels", "auto_levels", {}),
+        ("clahe", "clahe", {}),
+        ("rotate_90", "rotate", {"angle": 90}),
+        ("rotate_17", "rotate", {"angle": 17}),
+        ("flip", "flip", {"direction": "horizontal"}),
+        ("orient", "orient", {"orientation": "transpose"}),
+        ("resize", "resize", {"width": width // 2, "height": height // 2}),
+        ("crop", "crop", {"left": width // 4, "top": height // 4, "right": width * 3 // 4, "bottom": height * 3 // 4}),
+    ]
+
+
+def make_image(megapixels, mode="RGB"):
+    """Random PIL image of roughly the given size, 4:3."""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(megapixels * 1e6 / width)
+    channels = Image.getmodebands(mode)
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (height, width, channels), dtype=np.uint8)
+    return Image.fromarray(pixels[:, :, 0] if channels == 1 else pixels, mode)
+
+
+def history_cases(image, name, params):
+    """
+    Push, undo and redo of one operation, as (case, setup, func).
+
+    setup builds a fresh ImageManager in the state the step starts from and
+    is not timed, so every run times the same step on the same history.
+    """
+    operation = Operation.named(name, **params)
+    result = operation.apply(image)
+
+    def loaded():
+        manager = ImageManager()
+        manager.load_handle(ImageHandle(image), None)
+        return manager
+
+    def pushed():
+        manager = loaded()
+        manager.update_image(result, operation)
+        return manager
+
+    def undone():
+        manager = pushed()
+        manager.undo()
+        return manager
+
+    return [
+        (f"history_push_{name}", loaded, lambda manager: manager.update_image(result, operation)),
+        (f"history_undo_{name}", pushed, lambda manager: manager.undo()),
+        (f"history_redo_{name}", undone, lambda manager: manager.redo()),
+    ]
+
+
+def display_cases(image):
+    """Fit-to-window scaling, zoomed tiles, previews and the PIL hand-off."""
+    warm = DisplayPyramid(image)
+    edges = EdgeGradients(make_proxy(image, *VIEW)[0])
+    edges.edges(50, 150)
+    fitted = warm.scaled(*fit_size(image))
+    width, height = image_size(image)
+
+    def tiles():
+        pyramid = DisplayPyramid(image)
+        left, top = max(0, (width - VIEW[0]) // 2), max(0, (height - VIEW[1]) // 2)
+        for y in range(top, min(height, top + VIEW[1]), TILE):
+            for x in range(left, min(width, left + VIEW[0]), TILE):
+                pyramid.render(1.0, x, y, min(TILE, width - x), min(TILE, height - y))
+
+    return [
+        ("display_fit_cold", lambda: DisplayPyramid(image).scaled(*fit_size(image))),
+        ("display_fit_cached", lambda: warm.scaled(*fit_size(image))),
+        ("display_tiles_100pct", tiles),
+        ("display_proxy", lambda: make_proxy(image, *VIEW)),
+        ("display_to_pil", lambda: array_to_pil(fitted)),
+        ("preview_edges_retune", lambda: edges.edges(60, 180)),
+        ("display_histogram", lambda: compute_histogram(make_proxy(image, *VIEW)[0])),
+    ]
+
+
+def fit_size(image):
+    """Size image is shown at when fitted to VIEW."""
+    width, height = image_size(image)
+    scale = min(VIEW[0] / width, VIEW[1] / height, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def measure(func, repeat, setup=None):
+    """
+    Best wall time of repeat runs, then peak traced bytes of one more.
+
+    With setup, each run calls func(setup()) and only func is measured.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+
+    # Traced separately as tracing slows allocation down
+    args = (setup(),) if setup else ()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return best, peak
+
+
+def run(sizes, modes, repeat, only=None, op_modes=("RGB",)):
+    """Run every case and return the results keyed by "case@sizeMP"."""
+    results = {}
+
+    def record(key, func, megapixels, setup=None):
+        if only and not any(pattern in key for pattern in only):
+            return
+        seconds, peak = measure(func, repeat, setup)
+        results[key] = {
+            "seconds": seconds,
+            "megapixels_per_second": megapixels / seconds if seconds else None,
+            "peak_bytes": peak,
+        }
+        print(f"{key:<40}{seconds * 1000:>10.1f}ms{megapixels / seconds:>10.1f} MP/s{peak / 2 ** 20:>10.1f} MiB")
+
+    for megapixels in sizes:
+        for mode in modes:
+            # Decoding keeps grey and alpha and converts other modes to RGB
+            pil_image = make_image(megapixels, mode)
+            record(f"convert_{mode}@{megapixels:g}MP", lambda: pil_to_array(pil_image), megapixels)
+
+        for mode in op_modes:
+            source = pil_to_array(make_image(megapixels, mode))
+            width, height = image_size(source)
+            suffix = "" if mode == "RGB" else f"_{mode}"
+            for case, name, params in operation_cases(width, height):
+                bound = registry.get(name).bind(params)
+                record(
+                    f"op_{case}{suffix}@{megapixels:g}MP",
+                    lambda: registry.get(name).apply(source, bound), megapixels
+                )
+
+        image = pil_to_array(make_image(megapixels))
+
+        for name, params in (("brightness", {"value": 20}), ("flip", {"direction": "horizontal"})):
+            for case, setup, func in history_cases(image, name, params):
+                record(f"{case}@{megapixels:g}MP", func, megapixels, setup)
+
+        for case, func in display_cases(image):
+            record(f"{case}@{megapixels:g}MP", func, megapixels)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the change against baseline and return the keys that regressed."""
+    regressions = []
+    print(f"\n{'case':<40}{'baseline':>12}{'now':>12}{'change':>10}")
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        before, now = baseline[key]["seconds"], result["seconds"]
+        change = now / before - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<40}{before * 1000:>10.1f}ms{now * 1000:>10.1f}ms{change:>+10.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 12, 24, 50, 100],
+                        help="image sizes in megapixels")
+    parser.add_argument("--modes", nargs="+", default=["RGB", "RGBA", "L"],
+                        help="source image modes timed for conversion")
+    parser.add_argument("--op-modes", nargs="+", default=["RGB"],
+                        help="working modes the operations are timed on (L, LA, RGB, RGBA)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="run only cases whose key contains one of these")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="slowdown over the baseline reported as a regression (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    meta = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "workers": worker_count(),
+        "repeat": args.repeat,
+    }
+    print(", ".join(f"{key} {value}" for key, value in meta.items()))
+    results = run(args.sizes, args.modes, args.repeat, args.only, args.op_modes)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"meta": meta, "results": results}, file, indent=2)
+            file.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,146 @@
-from dynaconf import Dynaconf
+"""
+Config: Settings read once at startup into a read-only snapshot.
 
-settings = Dynaconf(
-    settings_files=["config/settings.toml", "settings.toml"],
-)
+config/settings.toml holds the defaults. A settings.toml in the working
+directory is merged over them, then environment variables such as
+DYNACONF_PERFORMANCE__TILE_SIZE=512 (sections joined by "__", values
+parsed as TOML) override single keys. Values are reached as attributes
+(settings.layout.canvas_padding) or items (settings["layout"]), both
+plain lookups so hot paths can read them freely. Keys are
+case-insensitive, as they were under Dynaconf.
+
+This replaces Dynaconf, whose import alone cost about 180 ms of start-up,
+and is why the editor needs Python 3.11 (tomllib). The snapshot is never
+written after start-up: settings that differ per process are taken from
+the environment before the process starts, and per-call choices such as
+the tiling backend are passed as arguments.
+"""
+
+import os
+import tomllib
+
+
+DEFAULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings.toml")
+LOCAL_PATH = "settings.toml"
+ENV_PREFIX = "DYNACONF_"
+
+
+class Section:
+    """A read-only table of settings, keyed by lower-case name."""
+
+    def __init__(self, values):
+        for key, value in values.items():
+            object.__setattr__(self, key.lower(), freeze(value))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("settings are read-only")
+
+    def __getattr__(self, name):
+        # Only reached on a miss, so lower-case reads stay plain lookups
+        try:
+            return self.__dict__[name.lower()]
+        except KeyError:
+            raise AttributeError(f"No setting '{name}'") from None
+
+    def __getitem__(self, key):
+        try:
+            return self.__dict__[key.lower()]
+        except KeyError:
+            raise KeyError(f"No setting '{key}'") from None
+
+    def __contains__(self, key):
+        return key.lower() in self.__dict__
+
+    def __iter__(self):
+        return iter(self.__dict__)
+
+    def __len__(self):
+        return len(self.__dict__)
+
+    def __repr__(self):
+        return f"Section({self.to_dict()!r})"
+
+    def get(self, key, default=None):
+        """The value of key, or default if it is not set."""
+        return self.__dict__.get(key.lower(), default)
+
+    def keys(self):
+        return self.__dict__.keys()
+
+    def items(self):
+        return self.__dict__.items()
+
+    def to_dict(self):
+        """Plain, mutable copy of the table."""
+        return {key: thaw(value) for key, value in self.__dict__.items()}
+
+
+def freeze(value):
+    """Read-only form of a parsed TOML value."""
+    if isinstance(value, dict):
+        return Section(value)
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Plain form of a frozen value."""
+    if isinstance(value, Section):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+def lower_keys(table):
+    """Copy of a parsed table with every key lower-cased, so files merge case-insensitively."""
+    return {
+        key.lower(): lower_keys(value) if isinstance(value, dict) else value
+        for key, value in table.items()
+    }
+
+
+def merge(base, update):
+    """Merge the update table into base, recursing into tables."""
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def parse_env_value(text):
+    """An environment value as a TOML value, or the plain string."""
+    try:
+        return tomllib.loads(f"value = {text}")["value"]
+    except tomllib.TOMLDecodeError:
+        return text
+
+
+def env_overrides(environ):
+    """Nested table of the DYNACONF_ variables in environ."""
+    overrides = {}
+    for name, text in environ.items():
+        if not name.startswith(ENV_PREFIX):
+            continue
+        *sections, key = name[len(ENV_PREFIX):].lower().split("__")
+        table = overrides
+        for section in sections:
+            table = table.setdefault(section, {})
+        table[key] = parse_env_value(text)
+    return overrides
+
+
+def load(environ=os.environ):
+    """Read the settings files and environment into a plain dict."""
+    with open(DEFAULTS_PATH, "rb") as file:
+        values = lower_keys(tomllib.load(file))
+    if os.path.isfile(LOCAL_PATH) and os.path.abspath(LOCAL_PATH) != DEFAULTS_PATH:
+        with open(LOCAL_PATH, "rb") as file:
+            merge(values, lower_keys(tomllib.load(file)))
+    return merge(values, env_overrides(environ))
+
+
+settings = Section(load())
@@ -1,3 +1,4 @@
+import os
 import tkinter as tk
 from tkinter import messagebox
 
@@ -5,6 +6,10 @@ from config.config import settings
 
 from core.image_manager import ImageManager
 from core.file_handler import FileHandler
+from core.navigation import DirectoryNavigator
+from core.history import Operation
+from core.preview import BlurPyramidCache, EdgeGradientsCache, HistogramCache, ProxyCache, PreviewRenderer, make_proxy
+from core.tasks import BackgroundTasks
 
 from ui.menu_bar import MenuBar
 from ui.status_bar import StatusBar
@@ -12,8 +17,11 @@ from ui.control_panel import ControlPanel
 from ui.canvas_display import CanvasDisplay
 from ui.dialogs import ResizeDialog, AboutDialog
 
-from operations import adjustments, filters, transforms
-from utils.validators import validate_blur_intensity
+from operations import adjustments
+from utils.formatting import format_bytes
+from utils.image_converter import image_size
+from utils import tracing
+from utils.validators import validate_blur_intensity, validate_dimensions
 
 
 class ImageEditorApp:
@@ -28,6 +36,13 @@ class ImageEditorApp:
         self.image_manager = ImageManager()
         self.file_handler = FileHandler()
         self.blur_base_image = None  # keeps the state before applying blur so re-applying isn't cumulative
+        self.proxy_cache = ProxyCache()  # display-sized copies used by live previews
+        self.blur_pyramids = BlurPyramidCache()  # per proxy, so slider moves reuse its levels
+        self.edge_gradients = EdgeGradientsCache()  # per proxy, so threshold moves skip Sobel
+        self.histograms = HistogramCache()  # per history state, for the histogram panel
+        self.preview_renderer = PreviewRenderer(root, self.show_preview_error)
+        self.file_tasks = None  # BackgroundTasks for open and save, needs the status bar
+        self.button_actions = self.create_button_actions()
         
         # UI components
         self.menu_bar = None
@@ -49,6 +64,13 @@ class ImageEditorApp:
         self.root.bind('<Control-S>', lambda event: self.save_image_as()) # Ctrl+Shift+S
         self.root.bind('<Control-z>', lambda event: self.undo())
         self.root.bind('<Control-y>', lambda event: self.redo())
+        self.root.bind('<Next>', lambda event: self.show_adjacent(1))  # Page Down
+        self.root.bind('<Prior>', lambda event: self.show_adjacent(-1))  # Page Up
+        self.root.bind('<Control-plus>', lambda event: self.canvas_display.zoom_by(True))
+        self.root.bind('<Control-equal>', lambda event: self.canvas_display.zoom_by(True))
+        self.root.bind('<Control-minus>', lambda event: self.canvas_display.zoom_by(False))
+        self.root.bind('<Control-0>', lambda event: self.canvas_display.set_zoom(None))
+        self.root.bind('<Control-1>', lambda event: self.canvas_display.set_zoom(1.0))
     
     def setup_ui(self):
         """Initialize all UI components."""
@@ -56,8 +78,17 @@ class ImageEditorApp:
             'open': self.open_image,
             'save': self.save_image,
             'save_as': self.save_image_as,
+            'next_image': lambda: self.show_adjacent(1),
+            'previous_image': lambda: self.show_adjacent(-1),
+            'export_recipe': self.export_recipe,
+            'apply_recipe': self.apply_recipe,
             'undo': self.undo,
             'redo': self.redo,
+            'zoom_in': lambda: self.canvas_display.zoom_by(True),
+            'zoom_out': lambda: self.canvas_display.zoom_by(False),
+            'zoom_fit': lambda: self.canvas_display.set_zoom(None),
+            'zoom_actual': lambda: self.canvas_display.set_zoom(1.0),
+            'export_trace': self.export_trace,
             'about': self.show_about
         })
         
@@ -67,6 +98,12 @@ class ImageEditorApp:
         # Status bar
         self.status_bar = StatusBar(self.root)
         self.status_bar.update(self.image_manager.filename)
+        self.file_tasks = BackgroundTasks(self.root, self.status_bar.show_progress)
+        self.navigator = DirectoryNavigator(
+            self.root,
+            self.finish_open,
+            lambda e: self.file_task_failed(f"Failed to open image:\n{str(e)}")
+        )
     
     def create_workspace(self):
         """Create main workspace with canvas and control panel"""
@@ -89,34 +126,80 @@ class ImageEditorApp:
             'button_click': self.handle_button_click,
             'slider_change': self.handle_slider_change,
             'apply_adjustments': self.apply_adjustments,
+            'edge_preview': self.toggle_edge_preview,
+            'edge_change': self.preview_edges,
             'reset_image': self.reset_image
         })
     
     def open_image(self):
-        """Open image file"""
-        image, filepath = self.file_handler.open_file()
+        """Open image file, decoding it on a background thread"""
+        filepath = self.file_handler.ask_open_path()
+        if not filepath:
+            return
         
-        if image and filepath:
-            self.image_manager.load_image(image, filepath)
-            self.canvas_display.display_image(self.image_manager.get_current_image())
-            self.update_status()
-            self.control_panel.reset_sliders()
-            # Prefill crop fields to full image size
-            w, h = self.image_manager.get_current_image().size
-            self.control_panel.set_crop_defaults(w, h)
-            self.blur_base_image = None
+        handle = self.navigator.cache.get(os.path.abspath(filepath))
+        if handle is not None:
+            # Prefetched while browsing its directory
+            self.finish_open(handle, filepath)
+            return
+        
+        filename = os.path.basename(filepath)
+        self.status_bar.show_progress(f"Opening {filename}...")
+        
+        def decode(progress):
+            image = self.file_handler.read_file(filepath)
+            return self.image_manager.decode(
+                image, filepath,
+                lambda fraction: progress(f"Opening {filename}... {fraction:.0%}")
+            )
+        
+        self.file_tasks.submit(
+            decode,
+            lambda handle: self.finish_open(handle, filepath),
+            lambda e: self.file_task_failed(f"Failed to open image:\n{str(e)}")
+        )
+    
+    def show_adjacent(self, offset):
+        """Open the image offset files away in the current image's directory"""
+        if not self.image_manager.filepath:
+            return
+        path = self.navigator.step(offset)
+        if path is None:
+            self.status_bar.show_save_message("No more images in this folder")
+            return
+        if self.image_manager.dirty and not messagebox.askyesno(
+            "Unsaved Changes", "Discard the changes to this image?"
+        ):
+            return
+        self.status_bar.show_progress(f"Opening {os.path.basename(path)}...")
+        self.navigator.open(path)
+    
+    def finish_open(self, handle, filepath):
+        """Show an image decoded by open_image or the navigator"""
+        self.preview_renderer.cancel()
+        self.image_manager.load_handle(handle, filepath)
+        self.navigator.set_current(filepath)
+        self.status_bar.show_progress("")
+        self.show_current_image()
+        self.update_status()
+        self.control_panel.reset_sliders()
+        # Prefill crop fields to full image size
+        w, h = image_size(self.image_manager.get_current_image())
+        self.control_panel.set_crop_defaults(w, h)
+        self.blur_base_image = None
     
     def save_image(self):
-        """Save current image"""
+        """Save current image, skipping the write if nothing changed"""
         if not self.image_manager.has_image():
             messagebox.showwarning("Warning", settings.messages.load_image_first)
             return
         
-        if self.file_handler.save_file(
-            self.image_manager.get_current_image(),
-            self.image_manager.filepath
-        ):
-            self.status_bar.show_save_message(f"Saved: {self.image_manager.filename}")
+        if not self.image_manager.filepath:
+            self.save_image_as()
+        elif not self.image_manager.dirty:
+            self.status_bar.show_save_message("No changes to save")
+        else:
+            self.save_to(self.image_manager.filepath)
     
     def save_image_as(self):
         """Save image with new filename"""
@@ -124,23 +207,100 @@ class ImageEditorApp:
             messagebox.showwarning("Warning", settings.messages.load_image_first)
             return
         
-        success, filepath = self.file_handler.save_file_as(
-            self.image_manager.get_current_image()
+        filepath = self.file_handler.ask_save_path()
+        if filepath:
+            self.save_to(filepath)
+    
+    def save_to(self, filepath):
+        """Encode and write the current image on a background thread"""
+        # Saving may replace the file the original is decoded from
+        self.image_manager.detach_original(filepath)
+        
+        # Edits made while saving produce new handles, so this one stays as is
+        handle = self.image_manager.current.acquire()
+        image = handle.image
+        original = self.image_manager.original
+        filename = os.path.basename(filepath)
+        self.status_bar.show_progress(f"Saving {filename}...")
+        
+        def saved(_):
+            handle.release()
+            if self.image_manager.original is original:
+                self.image_manager.mark_saved(handle, filepath)
+                self.navigator.set_current(filepath)
+                self.update_status()
+            self.status_bar.show_save_message(f"Saved: {filename}")
+        
+        def failed(e):
+            handle.release()
+            self.file_task_failed(f"Failed to save image:\n{str(e)}")
+        
+        self.file_tasks.submit(
+            lambda progress: self.file_handler.save_file(
+                image, filepath,
+                lambda written: progress(f"Saving {filename}... {format_bytes(written)}")
+            ),
+            saved,
+            failed
         )
+    
+    def file_task_failed(self, message):
+        """Report a failed background open or save"""
+        self.status_bar.show_progress("")
+        messagebox.showerror("Error", message)
+    
+    def export_recipe(self):
+        """Save the edits made since opening the image as a recipe file"""
+        if not self.image_manager.has_image():
+            messagebox.showwarning("Warning", settings.messages.load_image_first)
+            return
         
-        if success and filepath:
-            # Update path and filename - extract filename for display
-            filename = filepath.split("/")[-1]
-            self.image_manager.filepath = filepath
-            self.image_manager.filename = filename
-            
-            self.status_bar.show_save_message(f"Saved as: {filename}")
-            self.update_status()
+        recipe = self.image_manager.get_recipe()
+        if recipe is None:
+            messagebox.showerror("Error", "These edits cannot be saved as a recipe")
+            return
+        if not recipe:
+            self.status_bar.update("No edits to export")
+            return
+        
+        if self.file_handler.save_recipe(recipe):
+            self.status_bar.update(f"Exported recipe ({len(recipe)} steps)")
+    
+    def apply_recipe(self):
+        """Apply every step of a recipe file, each undoable on its own"""
+        if not self.image_manager.has_image():
+            messagebox.showwarning("Warning", settings.messages.load_image_first)
+            return
+        
+        recipe = self.file_handler.open_recipe()
+        if recipe is None:
+            return
+        
+        # Steps applied before a failure stay in the history, so the
+        # display is refreshed either way
+        applied = 0
+        try:
+            for name, params in recipe.steps:
+                self.apply_operation(Operation.named(name, **params))
+                applied += 1
+        except Exception as e:
+            messagebox.showerror("Error", f"Recipe failed:\n{str(e)}")
+        
+        self.blur_base_image = None
+        self.control_panel.edge_preview.set(False)
+        self.show_current_image()
+        self.update_status()
+        w, h = image_size(self.image_manager.get_current_image())
+        self.control_panel.set_crop_defaults(w, h)
+        if applied == len(recipe):
+            self.status_bar.update(f"Applied recipe ({applied} steps)")
+        else:
+            self.status_bar.update(f"Recipe failed after {applied} of {len(recipe)} steps")
     
     def undo(self):
         """Undo last operation"""
         if self.image_manager.undo():
-            self.canvas_display.display_image(self.image_manager.get_current_image())
+            self.show_current_image()
             self.update_status()
             self.blur_base_image = None
         else:
@@ -149,7 +309,7 @@ class ImageEditorApp:
     def redo(self):
         """Redo last undone operation"""
         if self.image_manager.redo():
-            self.canvas_display.display_image(self.image_manager.get_current_image())
+            self.show_current_image()
             self.update_status()
             self.blur_base_image = None
         else:
@@ -170,116 +330,153 @@ class ImageEditorApp:
                 return
             button_text = widget.cget("text")
         
+        action = self.button_actions.get(button_text)
+        if action is None:
+            return
+        
         try:
-            current_image = self.image_manager.get_current_image()
-            
+            with tracing.span(button_text, "operation"):
+                # Actions return False when they already reported a problem
+                if action() is False:
+                    return
+                
+                # Update display
+                self.control_panel.edge_preview.set(False)
+                self.show_current_image()
+            self.update_status()
+            self.show_latency()
+        
+        except Exception as e:
+            messagebox.showerror("Error", f"Operation failed:\n{str(e)}")
+    
+    def create_button_actions(self):
+        """Map control panel button labels to the operations they run."""
+        def named(name, message, **params):
+            return lambda: self.apply_named(name, message, **params)
+        
+        return {
             # FILTERS
-            if button_text == "Grayscale":
-                result = filters.apply_grayscale(current_image)
-                self.image_manager.update_image(result)
-                self.status_bar.update("Applied grayscale filter")
-                self.blur_base_image = None
-            
-            elif button_text == "Blur":
-                raw_intensity = self.control_panel.blur_slider.get()
-                intensity = validate_blur_intensity(raw_intensity)
-                # Use a stored baseline so re-applying blur doesn't stack
-                if self.blur_base_image is None:
-                    self.blur_base_image = current_image.copy()
-                base_image = self.blur_base_image.copy()
-
-                result = filters.apply_blur(base_image, intensity)
-                self.image_manager.update_image(result)
-                self.status_bar.update(f"Applied blur (intensity: {intensity})")
-            
-            elif button_text == "Edge Detect":
-                result = filters.apply_edge_detection(current_image)
-                self.image_manager.update_image(result)
-                self.status_bar.update("Applied edge detection")
-                self.blur_base_image = None
-            
+            "Grayscale": named("grayscale", "Applied grayscale filter"),
+            "Blur": self.apply_blur,
+            "Edge Detect": self.apply_edges,
             # TRANSFORMS - Rotation
-            elif button_text == "90°":
-                result = transforms.rotate_image(current_image, 90)
-                self.image_manager.update_image(result)
-                self.status_bar.update("Rotated 90° clockwise")
-                self.blur_base_image = None
-            
-            elif button_text == "180°":
-                result = transforms.rotate_image(current_image, 180)
-                self.image_manager.update_image(result)
-                self.status_bar.update("Rotated 180°")
-                self.blur_base_image = None
+            "90°": named("rotate", "Rotated 90° clockwise", angle=90),
+            "180°": named("rotate", "Rotated 180°", angle=180),
+            "270°": named("rotate", "Rotated 270° clockwise", angle=270),
+            # TRANSFORMS - Flipping
+            "Horizontal": named("flip", "Flipped horizontally", direction="horizontal"),
+            "Vertical": named("flip", "Flipped vertically", direction="vertical"),
+            "Resize": self.resize_from_entries,
+            "Crop": self.crop_from_entries,
+            # ADJUST - Auto enhance
+            "Auto Levels": lambda: self.apply_auto_enhance(adjustments.auto_levels_params, "Applied auto levels"),
+            "Auto Contrast": lambda: self.apply_auto_enhance(adjustments.auto_contrast_params, "Applied auto contrast"),
+            "CLAHE": named(
+                "clahe", "Applied CLAHE",
+                clip_limit=settings.histogram.clahe_clip_limit, grid=settings.histogram.clahe_grid
+            ),
+        }
+    
+    def apply_named(self, name, message, **params):
+        """Apply a registered operation to the current image and report it."""
+        result = self.apply_operation(Operation.named(name, **params))
+        self.status_bar.update(message)
+        self.blur_base_image = None
+        return result
+    
+    def apply_auto_enhance(self, params_for, message):
+        """
+        Stretch levels by params_for(histogram, clip) of the cached histogram.
+        
+        The black and white points come from the proxy histogram the panel
+        shows, so only the single lookup table pass touches full resolution,
+        and history records them as a plain levels step.
+        """
+        params = params_for(self.current_histogram(), settings.histogram.auto_clip)
+        return self.apply_named("levels", message, **params)
+    
+    def apply_blur(self):
+        """Blur with the slider intensity, replacing a blur applied just before."""
+        raw_intensity = self.control_panel.blur_slider.get()
+        intensity = validate_blur_intensity(raw_intensity)
+        operation = Operation.named("blur", intensity=intensity)
+        # Use a stored baseline so re-applying blur doesn't stack;
+        # images are shared read-only, so no copy is needed
+        if self.blur_base_image is None:
+            self.blur_base_image = self.image_manager.get_current_image()
+            self.apply_operation(operation)
+        else:
+            # Result is not derived from the current state, so it
+            # replaces the previous blur step in history
+            with tracing.span("compute", "compute", name=operation.name):
+                result = operation.apply(self.blur_base_image)
+            self.image_manager.update_image(result, operation, replaces=True)
+        self.status_bar.update(f"Applied blur (intensity: {intensity})")
+    
+    def edge_params(self):
+        """Canny thresholds and aperture set on the edge sliders."""
+        return {
+            "low": int(self.control_panel.edge_low_slider.get()),
+            "high": int(self.control_panel.edge_high_slider.get()),
+            "aperture": int(self.control_panel.edge_aperture_slider.get()),
+        }
+    
+    def apply_edges(self):
+        """Detect edges with the slider thresholds and aperture."""
+        return self.apply_named("edges", "Applied edge detection", **self.edge_params())
+    
+    def resize_from_entries(self):
+        """Resize to the width and height typed into the control panel."""
+        try:
+            width = int(self.control_panel.width_entry.get())
+            height = int(self.control_panel.height_entry.get())
+            self.resize_image(width, height)
+        except ValueError:
+            messagebox.showerror("Error", "Please enter valid integer values for Width and Height")
+        # resize_image refreshes the display itself
+        return False
+    
+    def crop_from_entries(self):
+        """Crop by the margins typed into the control panel."""
+        try:
+            # Treat inputs as margins to trim; blanks default to 0
+            l_raw = self.control_panel.crop_left.get().strip()
+            r_raw = self.control_panel.crop_right.get().strip()
+            t_raw = self.control_panel.crop_top.get().strip()
+            b_raw = self.control_panel.crop_bottom.get().strip()
             
-            elif button_text == "270°":
-                result = transforms.rotate_image(current_image, 270)
-                self.image_manager.update_image(result)
-                self.status_bar.update("Rotated 270° clockwise")
-                self.blur_base_image = None
+            left_trim = int(l_raw) if l_raw else 0
+            right_trim = int(r_raw) if r_raw else 0
+            top_trim = int(t_raw) if t_raw else 0
+            bottom_trim = int(b_raw) if b_raw else 0
             
-            # TRANSFORMS - Flipping
-            elif button_text == "Horizontal":
-                result = transforms.flip_image(current_image, "horizontal")
-                self.image_manager.update_image(result)
-                self.status_bar.update("Flipped horizontally")
-                self.blur_base_image = None
+            w, h = image_size(self.image_manager.get_current_image())
             
-            elif button_text == "Vertical":
-                result = transforms.flip_image(current_image, "vertical")
-                self.image_manager.update_image(result)
-                self.status_bar.update("Flipped vertically")
-                self.blur_base_image = None
+            # Convert margins into box coordinates
+            l = max(0, left_trim)
+            t = max(0, top_trim)
+            r = w - max(0, right_trim)
+            b = h - max(0, bottom_trim)
             
-            elif button_text == "Resize":
-                try:
-                    width = int(self.control_panel.width_entry.get())
-                    height = int(self.control_panel.height_entry.get())
-                    self.resize_image(width, height)
-                except ValueError:
-                    messagebox.showerror("Error", "Please enter valid integer values for Width and Height")
-                return
-
-            elif button_text == "Crop":
-                try:
-                    # Treat inputs as margins to trim; blanks default to 0
-                    l_raw = self.control_panel.crop_left.get().strip()
-                    r_raw = self.control_panel.crop_right.get().strip()
-                    t_raw = self.control_panel.crop_top.get().strip()
-                    b_raw = self.control_panel.crop_bottom.get().strip()
-
-                    left_trim = int(l_raw) if l_raw else 0
-                    right_trim = int(r_raw) if r_raw else 0
-                    top_trim = int(t_raw) if t_raw else 0
-                    bottom_trim = int(b_raw) if b_raw else 0
-
-                    w, h = current_image.size
-
-                    # Convert margins into box coordinates
-                    l = max(0, left_trim)
-                    t = max(0, top_trim)
-                    r = w - max(0, right_trim)
-                    b = h - max(0, bottom_trim)
-
-                    if l >= r or t >= b:
-                        raise ValueError("Crop margins remove the whole image; reduce the values.")
-
-                    result = transforms.crop_image(current_image, l, t, r, b)
-                    self.image_manager.update_image(result)
-                    self.status_bar.update("Cropped image")
-                    # Update defaults to new size so next crop starts from full current image
-                    w, h = result.size
-                    self.control_panel.set_crop_defaults(w, h)
-                    self.blur_base_image = None
-                except Exception as e:
-                    messagebox.showerror("Error", f"Crop failed:\n{str(e)}")
-                    return
+            if l >= r or t >= b:
+                raise ValueError("Crop margins remove the whole image; reduce the values.")
             
-            # Update display
-            self.canvas_display.display_image(self.image_manager.get_current_image())
-            self.update_status()
-        
+            result = self.apply_named("crop", "Cropped image", left=l, top=t, right=r, bottom=b)
+            # Update defaults to new size so next crop starts from full current image
+            w, h = image_size(result)
+            self.control_panel.set_crop_defaults(w, h)
         except Exception as e:
-            messagebox.showerror("Error", f"Operation failed:\n{str(e)}")
+            messagebox.showerror("Error", f"Crop failed:\n{str(e)}")
+            return False
+    
+    def apply_operation(self, operation):
+        """Run operation on the current image and record it in history."""
+        source = self.image_manager.get_current_image()
+        with tracing.span("compute", "compute", name=operation.name):
+            result = operation.apply(source)
+        self.image_manager.update_image(result, operation)
+        self.histograms.carry(source, self.image_manager.get_current_image(), operation)
+        return result
     
     def handle_slider_change(self, value):
         """Handle slider value changes"""
@@ -293,6 +490,8 @@ class ImageEditorApp:
             
             if tab_text == "Adjust":
                 self.preview_adjustments()
+            elif tab_text == "Filters":
+                self.preview_blur()
         
         except Exception as e:
             print(f"Slider error: {e}")
@@ -307,26 +506,102 @@ class ImageEditorApp:
         self.control_panel.brightness_value.config(text=str(int(brightness_val)))
         self.control_panel.contrast_value.config(text=str(int(contrast_val)))
         
-        # Apply to original image (not current, for clean preview)
-        temp_image = self.image_manager.get_current_image().copy()
-        
-        # Apply brightness
-        if brightness_val != 0:
-            temp_image = adjustments.adjust_brightness(temp_image, brightness_val)
-        
-        # Apply contrast
-        if contrast_val != 0:
-            temp_image = adjustments.adjust_contrast(temp_image, contrast_val)
-
-        # Apply saturation
+        sat_val = 0
         if hasattr(self.control_panel, "sat_slider"):
             sat_val = self.control_panel.sat_slider.get()
             self.control_panel.sat_value.config(text=str(int(sat_val)))
-            if sat_val != 0:
-                temp_image = adjustments.adjust_saturation(temp_image, sat_val)
         
-        # Display preview (don't update history yet)
-        self.canvas_display.display_image(temp_image)
+        # Render on a proxy of the current image and display it (don't update history yet)
+        self.render_preview(
+            lambda proxy, scale: adjustments.apply_adjustments(proxy, brightness_val, contrast_val, sat_val)
+        )
+    
+    def preview_blur(self):
+        """Preview the blur slider intensity on a display-sized proxy"""
+        intensity = validate_blur_intensity(self.control_panel.blur_slider.get())
+        # Blur is re-applied to its stored baseline, so preview that too
+        base_image = self.blur_base_image
+        if base_image is None:
+            base_image = self.image_manager.get_current_image()
+        
+        self.render_preview(
+            lambda proxy, scale: self.blur_pyramids.get(proxy).blur(intensity, scale),
+            base_image
+        )
+    
+    def toggle_edge_preview(self):
+        """Show or hide an edge detection preview on a display-sized proxy"""
+        if not self.image_manager.has_image():
+            self.control_panel.edge_preview.set(False)
+            return
+        
+        if self.control_panel.edge_preview.get():
+            self.preview_edges()
+        else:
+            self.show_current_image()
+    
+    def preview_edges(self):
+        """Preview edges at the slider thresholds, turning the edge preview on"""
+        if not self.image_manager.has_image():
+            return
+        
+        self.control_panel.edge_preview.set(True)
+        params = self.edge_params()
+        # Sobel runs once per proxy and aperture; thresholds only redo Canny's last steps
+        self.render_preview(lambda proxy, scale: self.edge_gradients.get(proxy).edges(**params))
+    
+    def render_preview(self, render, image=None):
+        """
+        Preview render(proxy, scale) of image, the current image by default.
+        
+        render runs on the preview worker against a display-sized proxy that
+        is cached until the image or the canvas size changes, so previews
+        cost the same whatever the source resolution. A newer preview
+        supersedes one still queued or running.
+        """
+        if image is None:
+            image = self.image_manager.get_current_image()
+        view_size = self.canvas_display.get_view_size()
+        
+        def job():
+            proxy, scale = self.proxy_cache.get(image, *view_size)
+            frame = render(proxy, scale)
+            return frame, adjustments.compute_histogram(frame)
+        
+        self.preview_renderer.submit(job, self.show_preview)
+    
+    def show_preview(self, result):
+        """Display a preview frame and its histogram."""
+        frame, histogram = result
+        self.canvas_display.display_preview(frame)
+        self.control_panel.histogram.show(histogram)
+    
+    def show_preview_error(self, error):
+        """Report a preview that failed to render in the status bar."""
+        self.status_bar.show_save_message(f"Preview failed: {error}")
+    
+    def show_current_image(self):
+        """Drop pending previews and display the current image."""
+        self.preview_renderer.cancel()
+        self.canvas_display.display_image(self.image_manager.get_current_image())
+        with tracing.span("histogram", "display"):
+            self.control_panel.histogram.show(self.current_histogram())
+    
+    def current_histogram(self):
+        """Histogram of the current image, from the cache when it has one."""
+        image = self.image_manager.get_current_image()
+        return self.histograms.get(image, lambda: self.histogram_proxy(image))
+    
+    def histogram_proxy(self, image):
+        """A copy of image with about settings.histogram.proxy_pixels pixels."""
+        width, height = image_size(image)
+        scale = min(1.0, (settings.histogram.proxy_pixels / (width * height)) ** 0.5)
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        pyramid = self.canvas_display.pyramid
+        if pyramid is not None and pyramid.image is image:
+            # The display has usually built this level already
+            return pyramid.covering(*size)
+        return make_proxy(image, *size)[0]
     
     def apply_adjustments(self):
         """Apply and save brightness/contrast adjustments"""
@@ -343,22 +618,14 @@ class ImageEditorApp:
             return
         
         try:
-            # Apply to original
-            result = self.image_manager.get_current_image().copy()
-            
-            if brightness_val != 0:
-                result = adjustments.adjust_brightness(result, brightness_val)
-            
-            if contrast_val != 0:
-                result = adjustments.adjust_contrast(result, contrast_val)
-
-            if sat_val != 0:
-                result = adjustments.adjust_saturation(result, sat_val)
-            
             # Update image and history
-            self.image_manager.update_image(result)
-            self.canvas_display.display_image(result)
+            with tracing.span("Apply Adjustments", "operation"):
+                self.apply_operation(Operation.named(
+                    "adjust", brightness=brightness_val, contrast=contrast_val, saturation=sat_val
+                ))
+                self.show_current_image()
             self.update_status()
+            self.show_latency()
             
             # Reset sliders
             self.control_panel.reset_sliders()
@@ -370,24 +637,27 @@ class ImageEditorApp:
     
     def show_resize_dialog(self):
         """Show resize dialog"""
-        current_size = self.image_manager.get_current_image().size
+        current_size = image_size(self.image_manager.get_current_image())
         ResizeDialog(self.root, current_size, self.resize_image)
     
     def resize_image(self, width, height):
         """
         Resize image to specified dimensions
         """
+        valid, error = validate_dimensions(width, height)
+        if not valid:
+            messagebox.showerror("Error", f"Resize failed:\n{error}")
+            return
+        
         try:
-            current_image = self.image_manager.get_current_image()
-            result = transforms.resize_image(current_image, width, height)
-            self.image_manager.update_image(result)
-            self.canvas_display.display_image(result)
+            self.apply_operation(Operation.named("resize", width=width, height=height))
+            self.show_current_image()
             self.update_status()
             self.blur_base_image = None
         
         except Exception as e:
             messagebox.showerror("Error", f"Resize failed:\n{str(e)}")
-
+    
     def reset_image(self):
         """Restore image to the original loaded state."""
         if not self.image_manager.has_image():
@@ -395,9 +665,9 @@ class ImageEditorApp:
             return
         
         if self.image_manager.reset():
-            self.canvas_display.display_image(self.image_manager.get_current_image())
+            self.show_current_image()
             self.update_status()
-            w, h = self.image_manager.get_current_image().size
+            w, h = image_size(self.image_manager.get_current_image())
             self.control_panel.set_crop_defaults(w, h)
             self.status_bar.update("Reverted to original image")
             self.blur_base_image = None
@@ -408,12 +678,33 @@ class ImageEditorApp:
         """Show about dialog"""
         AboutDialog.show(self.root)
     
+    def show_latency(self):
+        """Show where the last operation spent its time, if enabled in settings"""
+        span = tracing.TRACER.last_operation
+        if settings.tracing.show_latency and span is not None:
+            self.status_bar.show_latency(tracing.breakdown(span))
+    
+    def export_trace(self):
+        """Save the recorded spans as a Chrome trace (chrome://tracing, Perfetto)"""
+        if not tracing.TRACER.enabled:
+            messagebox.showinfo("Tracing", "Tracing is off; set tracing.enabled in config/settings.toml.")
+            return
+        filepath = self.file_handler.ask_trace_path()
+        if filepath:
+            count = tracing.TRACER.export(filepath)
+            self.status_bar.show_save_message(f"Exported {count} spans")
+    
     def update_status(self):
         """Update status bar with current image info"""
         info = self.image_manager.get_image_info()
         if info['width'] > 0:
+            # * marks changes that have not been saved
+            modified = " *" if self.image_manager.dirty else ""
             self.status_bar.update(
-                f"{info['filename']} | {info['width']} × {info['height']} px"
+                f"{info['filename']}{modified} | {info['width']} × {info['height']} px | {info['mode']}"
             )
         else:
             self.status_bar.update(info['filename'])
+        
+        if self.image_manager.has_image():
+            self.status_bar.show_history_size(self.image_manager.get_history_size())
@@ -0,0 +1,256 @@
+"""Batch: Apply editor operations to many files without the GUI."""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import cv2
+from PIL import Image
+from config.config import settings
+from operations import registry
+from operations.recipe import Recipe
+from utils.file_io import save_atomic, supported_extensions
+from utils.formatting import format_bytes
+from utils.image_converter import pil_to_array
+from utils.out_of_core import decode_to_scratch, is_large
+
+
+def parse_operation(spec):
+    """
+    Parse "name" or "name:key=value,key=value" into (name, params).
+
+    Values are converted to the registered parameter types. Raises
+    ValueError for an unknown operation or invalid parameters.
+    """
+    name, _, args = spec.partition(":")
+    params = {}
+    for pair in filter(None, args.split(",")):
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"Expected key=value in '{spec}'")
+        params[key.strip()] = value.strip()
+    return name.strip().lower(), params
+
+
+def iter_inputs(source):
+    """
+    Yield (path, relative path) for every image in a directory or glob.
+
+    Files are produced as they are found, so huge directories are never
+    listed in full.
+    """
+    extensions = supported_extensions()
+    if os.path.isdir(source):
+        root = source
+        paths = (
+            os.path.join(directory, name)
+            for directory, _, names in os.walk(source)
+            for name in names
+        )
+    else:
+        # Output paths are relative to the part of the pattern without wildcards
+        parts = []
+        for part in source.split(os.sep):
+            if any(char in part for char in "*?["):
+                break
+            parts.append(part)
+        root = os.sep.join(parts) or "."
+        paths = glob.iglob(source, recursive=True)
+
+    for path in paths:
+        if os.path.isfile(path) and os.path.splitext(path)[1].lower() in extensions:
+            yield path, os.path.relpath(path, root)
+
+
+def output_path(output_dir, relative, extension=None):
+    """Where the result for an input at relative is written."""
+    if extension:
+        relative = os.path.splitext(relative)[0] + "." + extension.lstrip(".")
+    return os.path.join(output_dir, relative)
+
+
+def recipe_key(operations, extension, profile=None):
+    """Short hash identifying the operation list and output encoding, for the resume manifest."""
+    text = json.dumps([operations, extension, profile], sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+def load_manifest(path):
+    """Set of inputs already completed by an earlier run."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as manifest:
+        return {line.rstrip("\n") for line in manifest if line.strip()}
+
+
+def init_worker():
+    """
+    Keep each worker process on one thread; the pool provides the parallelism.
+
+    Tiling inside a worker is already limited to one thread by worker_count().
+    """
+    cv2.setNumThreads(1)
+
+
+def process_file(task):
+    """
+    Worker: load one file, apply the operations and save it atomically.
+
+    Returns (relative input path, input bytes, error message or None).
+    """
+    source, relative, destination, operations, profile = task
+    try:
+        size = os.path.getsize(source)
+        with Image.open(source) as pil_image:
+            if is_large(*pil_image.size):
+                image = decode_to_scratch(pil_image)
+            else:
+                image = pil_to_array(pil_image)
+
+        image = Recipe(operations).apply(image)
+
+        save_atomic(image, destination, profile=profile)
+        return relative, size, None
+    except Exception as e:
+        return relative, 0, str(e)
+
+
+class Progress:
+    """Counts finished files and reports throughput."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.last_report = self.start
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes = 0
+
+    def add(self, size, error=None):
+        """Record a finished file and report if the interval has passed."""
+        if error:
+            self.failed += 1
+        else:
+            self.done += 1
+            self.bytes += size
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report()
+
+    def report(self, final=False):
+        """Print counts, images/s and MB/s read so far."""
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        label = "Finished" if final else "Progress"
+        print(
+            f"{label}: {self.done} done, {self.skipped} skipped, {self.failed} failed"
+            f" | {self.done / elapsed:.1f} images/s"
+            f" | {self.bytes / elapsed / 1e6:.1f} MB/s"
+            f" | {format_bytes(self.bytes)} in {elapsed:.1f}s",
+            file=sys.stderr
+        )
+
+
+def run_batch(source, output_dir, operations, workers=0, extension=None, resume=True, profile=None):
+    """
+    Apply operations to every image in source and write them to output_dir.
+
+    operations is the list of (name, params) steps of a Recipe and profile
+    the encoder profile to save with (default: settings.encoder.profile).
+    Completed inputs are appended to a manifest in output_dir as they
+    finish, so an interrupted run continues where it stopped. Returns the
+    Progress with the final counts.
+    """
+    workers = workers or settings.batch.workers or os.cpu_count() or 1
+    profile = profile or settings.encoder.profile
+    in_flight = workers * max(1, settings.batch.queue_per_worker)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, f".batch-{recipe_key(operations, extension, profile)}.done")
+    completed = load_manifest(manifest_path) if resume else set()
+    progress = Progress(settings.batch.report_interval)
+
+    with open(manifest_path, "a" if resume else "w", encoding="utf-8") as manifest, \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        pending = set()
+        try:
+            for source_path, relative in iter_inputs(source):
+                # The manifest holds relative paths, so a run resumes even
+                # when the source is spelled differently
+                if relative in completed:
+                    progress.skipped += 1
+                    continue
+                destination = output_path(output_dir, relative, extension)
+                pending.add(executor.submit(process_file, (source_path, relative, destination, operations, profile)))
+
+                # Keep a bounded number of files queued so inputs stream
+                if len(pending) >= in_flight:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    record(finished, manifest, progress)
+
+            finished, pending = wait(pending)
+            record(finished, manifest, progress)
+        except KeyboardInterrupt:
+            for future in pending:
+                future.cancel()
+            print("Interrupted; run again to resume.", file=sys.stderr)
+            raise
+        finally:
+            progress.report(final=True)
+    return progress
+
+
+def record(finished, manifest, progress):
+    """Log the results of finished futures and mark successes as done."""
+    for future in finished:
+        relative, size, error = future.result()
+        if error:
+            print(f"Failed: {relative}: {error}", file=sys.stderr)
+        else:
+            manifest.write(relative + "\n")
+        progress.add(size, error)
+    manifest.flush()
+
+
+def main(argv=None):
+    """Command line entry point; returns the process exit code."""
+    parser = argparse.ArgumentParser(
+        prog="main.py batch",
+        description="Apply editor operations to a directory or glob of images."
+    )
+    parser.add_argument("source", help="input directory or glob pattern (quote it)")
+    parser.add_argument("output", help="output directory")
+    parser.add_argument(
+        "-o", "--op", dest="operations", action="append", default=[], metavar="NAME[:KEY=VALUE,...]",
+        help=f"operation to apply, repeatable and applied in order ({', '.join(registry.OPERATIONS)})"
+    )
+    parser.add_argument("-r", "--recipe", help="recipe file (.json or .toml) applied before any --op")
+    parser.add_argument("-j", "--workers", type=int, default=0, help="worker processes (default: one per CPU)")
+    parser.add_argument("--format", dest="extension", help="output extension, e.g. png (default: keep the input's)")
+    parser.add_argument(
+        "--profile", choices=list(settings.encoder.profiles),
+        help=f"encoder profile from settings.toml (default: {settings.encoder.profile})"
+    )
+    parser.add_argument("--no-resume", dest="resume", action="store_false", help="process files done by an earlier run again")
+    args = parser.parse_args(argv)
+
+    try:
+        recipe = Recipe.load(args.recipe) if args.recipe else Recipe()
+        recipe.steps += Recipe(parse_operation(spec) for spec in args.operations).steps
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    operations = recipe.steps
+
+    try:
+        progress = run_batch(args.source, args.output, operations, args.workers, args.extension, args.resume, args.profile)
+    except KeyboardInterrupt:
+        return 130
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
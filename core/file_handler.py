@@ -1,69 +1,100 @@
 from tkinter import filedialog, messagebox
 from PIL import Image
 from config.config import settings
+from operations.recipe import Recipe
+from utils.file_io import save_atomic
+
+
+# Size is checked against performance.max_image_pixels in read_file instead
+Image.MAX_IMAGE_PIXELS = None
 
 
 class FileHandler:
-    """Manages file operations for images"""
+    """
+    Manages file operations for images.
+    
+    The ask_* methods show dialogs on the Tk thread; read_file and
+    save_file do the slow part and may run on a background thread.
+    """
     
     @staticmethod
-    def open_file():
-        """Open file dialog and load image."""
+    def ask_open_path():
+        """Open file dialog and return the chosen path, or None."""
         filepath = filedialog.askopenfilename(
             title="Open Image",
             filetypes=settings.file_types.supported_formats
         )
-        
-        if not filepath:
-            return None, None
-        
-        try:
-            image = Image.open(filepath)
-            return image, filepath
-        
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to open image:\n{str(e)}")
-            return None, None
+        return filepath or None
     
     @staticmethod
-    def save_file(image, current_filename=None):
-        """Save image (overwrite if filename exists)."""
-        if not image:
-            messagebox.showwarning("Warning", "No image to save!")
-            return False
+    def ask_save_path():
+        """Save file dialog and return the chosen path, or None."""
+        filepath = filedialog.asksaveasfilename(
+            title="Save Image As",
+            defaultextension=settings.file_types.default_save_extension,
+            filetypes=settings.file_types.save_formats
+        )
+        return filepath or None
+    
+    @staticmethod
+    def ask_trace_path():
+        """Save dialog for a Chrome trace; returns the chosen path, or None."""
+        filepath = filedialog.asksaveasfilename(
+            title="Export Trace",
+            defaultextension=".json",
+            filetypes=[["Chrome Trace", "*.json"]]
+        )
+        return filepath or None
+    
+    @staticmethod
+    def read_file(filepath):
+        """Open an image file lazily; raises ValueError if it is too large."""
+        image = Image.open(filepath)
+        width, height = image.size
+        if width * height > settings.performance.max_image_pixels:
+            image.close()
+            raise ValueError(f"Image is too large ({width}x{height})")
+        return image
+    
+    @staticmethod
+    def save_file(image, filepath, progress=None, profile=None):
+        """Write image array to filepath atomically with an encoder profile (see utils.file_io)."""
+        save_atomic(image, filepath, progress, profile)
+    
+    @staticmethod
+    def open_recipe():
+        """Open file dialog and load an edit recipe."""
+        filepath = filedialog.askopenfilename(
+            title="Apply Recipe",
+            filetypes=settings.file_types.recipe_formats
+        )
         
-        # If no filename, use save as
-        if not current_filename or current_filename == "No image loaded":
-            return FileHandler.save_file_as(image)
+        if not filepath:
+            return None
         
         try:
-            image.save(current_filename)
-            return True
+            return Recipe.load(filepath)
         
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to save image:\n{str(e)}")
-            return False
+            messagebox.showerror("Error", f"Failed to load recipe:\n{str(e)}")
+            return None
     
     @staticmethod
-    def save_file_as(image):
-        """Save image with new filename."""
-        if not image:
-            messagebox.showwarning("Warning", "No image to save!")
-            return False, None
-        
+    def save_recipe(recipe):
+        """Save an edit recipe with a file dialog."""
         filepath = filedialog.asksaveasfilename(
-            title="Save Image As",
-            defaultextension=settings.file_types.default_save_extension,
-            filetypes=settings.file_types.save_formats
+            title="Export Recipe",
+            defaultextension=".json",
+            filetypes=settings.file_types.recipe_formats
         )
         
         if not filepath:
-            return False, None
+            return False
         
         try:
-            image.save(filepath)
-            return True, filepath
+            recipe.save(filepath)
+            return True
         
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to save image:\n{str(e)}")
-            return False, None
\ No newline at end of file
+            messagebox.showerror("Error", f"Failed to save recipe:\n{str(e)}")
+            return False
\ No newline at end of file
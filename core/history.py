@@ -0,0 +1,258 @@
+"""History: Operation log with periodic checkpoints for undo/redo."""
+
+import zlib
+import numpy as np
+from config.config import settings
+from core.image_handle import ImageHandle
+from operations import registry
+
+
+class Operation:
+    """A replayable edit: an image function plus its keyword parameters."""
+
+    def __init__(self, func, params=None, inverse=None, name=None):
+        self.func = func
+        self.params = params or {}
+        self.inverse = inverse  # Operation that exactly undoes this one, if any
+        self.name = name  # registry name, so the edit can be saved in a recipe
+
+    @classmethod
+    def named(cls, name, **params):
+        """Operation for a registered operation, with its inverse if it has one."""
+        spec = registry.get(name)
+        params = spec.bind(params)
+        inverse = None
+        undo = spec.inverse(params) if spec.inverse else None
+        if undo is not None:
+            undo_spec = registry.get(undo[0])
+            inverse = cls(undo_spec.func, undo_spec.bind(undo[1]), name=undo[0])
+        return cls(spec.func, params, inverse, name)
+
+    @property
+    def is_lossless(self):
+        """Check if the operation can be undone without stored pixels"""
+        return self.inverse is not None
+
+    def apply(self, image):
+        """Run the operation on image and return the result."""
+        return self.func(image, **self.params)
+
+
+class Snapshot:
+    """A checkpoint state, held as a shared handle or a compressed buffer."""
+
+    def __init__(self, handle):
+        self.handle = handle.acquire()
+        self.pinned = True  # whether this snapshot keeps the pixels resident
+        self.shape = handle.shape
+        self.data = None
+
+    @property
+    def is_compressed(self):
+        """Check if the pixels are only available compressed"""
+        return self.data is not None
+
+    @property
+    def nbytes(self):
+        """Number of bytes this snapshot keeps in memory."""
+        if self.data is not None:
+            return len(self.data)
+        return self.handle.nbytes if self.pinned else 0
+
+    def compress(self):
+        """Stop pinning the decoded pixels, compressing them if needed."""
+        if not self.pinned or self.handle.is_mapped:
+            # A mapped state already lives on disk; compressing it would
+            # pull the whole frame into memory
+            return
+        self.pinned = False
+        if self.handle.is_file_backed:
+            # The file on disk already is the compressed copy
+            self.handle.release()
+            return
+        level = settings.image_processing.history_compression_level
+        self.data = zlib.compress(self.handle.image, level)
+        self.handle.release()
+        self.handle = None
+
+    def discard(self):
+        """Stop pinning the pixels without keeping a compressed copy."""
+        if self.pinned:
+            self.pinned = False
+            self.handle.release()
+
+    def restore(self):
+        """Return a handle to the stored state."""
+        if self.data is not None:
+            pixels = np.frombuffer(zlib.decompress(self.data), dtype=np.uint8)
+            return ImageHandle(pixels.reshape(self.shape))
+        return self.handle
+
+
+class HistoryEntry:
+    """One step in the log: the operation that produced it and an optional checkpoint."""
+
+    def __init__(self, operation=None, checkpoint=None, replaces=False):
+        self.operation = operation
+        self.checkpoint = checkpoint
+        # The operation was applied to the state before the previous step
+        # instead of after it (re-applying blur), so it replaces that step
+        self.replaces = replaces
+
+
+class History:
+    """
+    Undo/redo log of operations.
+
+    Every state is the previous state with the entry's operation applied.
+    Lossless operations are undone by applying their inverse, anything
+    else is recomputed from the nearest checkpoint at or before the target
+    state. A checkpoint is stored for the first state, for operations that
+    cannot be replayed and every history_checkpoint_interval steps, so
+    replaying never takes more than that many operations.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.index = -1
+        self.base_steps = []  # steps of entries dropped by the limits, None if not named
+
+    def reset(self, handle):
+        """Start a new history with handle as the only state."""
+        self.discard(self.entries)
+        self.entries = [HistoryEntry(checkpoint=Snapshot(handle))]
+        self.index = 0
+        self.base_steps = []
+
+    def push(self, handle, operation=None, replaces=False):
+        """
+        Record a new state after the current one, dropping any redo states.
+
+        With replaces, operation produced the state from the one before the
+        current state; it cannot be replayed so a checkpoint is stored.
+        """
+        self.discard(self.entries[self.index + 1:])
+        self.entries = self.entries[:self.index + 1]
+
+        entry = HistoryEntry(operation, replaces=replaces)
+        interval = max(1, settings.image_processing.history_checkpoint_interval)
+        if operation is None or replaces or self.steps_since_checkpoint(len(self.entries) - 1) + 1 >= interval:
+            entry.checkpoint = Snapshot(handle)
+
+        self.entries.append(entry)
+        self.index += 1
+
+        # Only the most recent checkpoints stay decoded
+        keep = max(1, settings.image_processing.history_uncompressed_entries)
+        checkpoints = [e.checkpoint for e in self.entries if e.checkpoint is not None]
+        for snapshot in checkpoints[:-keep]:
+            snapshot.compress()
+
+        self.enforce_limits()
+
+    def steps_since_checkpoint(self, index):
+        """Number of operations to replay to rebuild the state at index."""
+        return index - self.nearest_checkpoint(index)
+
+    def nearest_checkpoint(self, index):
+        """Index of the closest entry at or before index that has a checkpoint."""
+        while self.entries[index].checkpoint is None:
+            index -= 1
+        return index
+
+    def enforce_limits(self):
+        """Drop the oldest states until count and byte budget are respected."""
+        max_entries = settings.image_processing.max_undo_history
+        max_bytes = settings.image_processing.max_history_bytes
+
+        while len(self.entries) > max_entries or self.nbytes > max_bytes:
+            # The oldest kept state must be a checkpoint, so states are
+            # dropped up to the next checkpoint that is not ahead of us.
+            cut = next(
+                (i for i in range(1, self.index + 1) if self.entries[i].checkpoint is not None),
+                None
+            )
+            if cut is None:
+                break
+            # entries[cut] becomes the first state, so its step is kept too
+            self.base_steps = self.collect_steps(self.base_steps, self.entries[1:cut + 1])
+            self.discard(self.entries[:cut])
+            self.entries = self.entries[cut:]
+            self.index -= cut
+
+    @staticmethod
+    def discard(entries):
+        """Release the checkpoints of entries that leave the history."""
+        for entry in entries:
+            if entry.checkpoint is not None:
+                entry.checkpoint.discard()
+
+    def rebuild(self, index):
+        """Recompute the state at index from its nearest checkpoint."""
+        start = self.nearest_checkpoint(index)
+        handle = self.entries[start].checkpoint.restore()
+        if start == index:
+            return handle
+        image = handle.image
+        for entry in self.entries[start + 1:index + 1]:
+            image = entry.operation.apply(image)
+        handle.evict()
+        return ImageHandle(image)
+
+    def undo(self, current):
+        """Step back one state from the current handle and return it, or None."""
+        if not self.can_undo():
+            return None
+        operation = self.entries[self.index].operation
+        self.index -= 1
+
+        if operation is not None and operation.is_lossless:
+            return ImageHandle(operation.inverse.apply(current.image))
+        return self.rebuild(self.index)
+
+    def redo(self, current):
+        """Step forward one state from the current handle and return it, or None."""
+        if not self.can_redo():
+            return None
+        self.index += 1
+
+        entry = self.entries[self.index]
+        if entry.checkpoint is not None:
+            return entry.checkpoint.restore()
+        return ImageHandle(entry.operation.apply(current.image))
+
+    def steps(self):
+        """
+        (name, params) of the named operations from the loaded image to the current state.
+
+        Returns None if a step has no registry name, as the edits could not
+        be replayed.
+        """
+        return self.collect_steps(self.base_steps, self.entries[1:self.index + 1])
+
+    @staticmethod
+    def collect_steps(steps, entries):
+        """steps extended with the operations of entries, or None if one is unnamed."""
+        if steps is None:
+            return None
+        steps = list(steps)
+        for entry in entries:
+            if entry.operation is None or entry.operation.name is None:
+                return None
+            if entry.replaces and steps:
+                steps.pop()
+            steps.append((entry.operation.name, dict(entry.operation.params)))
+        return steps
+
+    def can_undo(self):
+        """Check if undo is available"""
+        return self.index > 0
+
+    def can_redo(self):
+        """Check if redo is available"""
+        return self.index < len(self.entries) - 1
+
+    @property
+    def nbytes(self):
+        """Total number of bytes held by history checkpoints."""
+        return sum(e.checkpoint.nbytes for e in self.entries if e.checkpoint is not None)
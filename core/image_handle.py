@@ -0,0 +1,112 @@
+"""Image Handle: Shared, read-only reference to a decoded image."""
+
+import os
+from PIL import Image
+from utils.image_converter import CHANNEL_MODES, pil_to_array, freeze, working_shape
+from utils.out_of_core import is_mapped
+
+
+class ImageHandle:
+    """
+    Read-only image shared between the current state, history and display.
+
+    The pixels are a working array (see utils.image_converter) that is
+    marked read-only, so operations always write new arrays and several
+    handles may share one. Holders that need the pixels kept in memory
+    call acquire() and release(). A handle backed by a file can drop its
+    pixels once nobody holds it and decodes them again on access. Very
+    large images are held in a memory-mapped scratch file (see
+    utils.out_of_core) instead of a file backed handle.
+    """
+
+    def __init__(self, array=None, filepath=None, decoded=None):
+        self._array = freeze(array) if array is not None else None
+        self._decoded = decoded  # PIL image from the file, converted on first access
+        self.filepath = filepath
+        self.refcount = 0
+        self._stat = file_signature(filepath) if filepath else None
+
+        if array is not None:
+            self.shape = array.shape
+        else:
+            # Header only, pixels are decoded on first access
+            header = decoded or Image.open(filepath)
+            self.shape = working_shape(header)
+            if decoded is None:
+                header.close()
+
+    @classmethod
+    def from_file(cls, filepath, image=None):
+        """Create a handle that can re-decode its pixels from filepath."""
+        return cls(filepath=filepath, decoded=image)
+
+    @property
+    def size(self):
+        """(width, height) of the image"""
+        return self.shape[1], self.shape[0]
+
+    @property
+    def mode(self):
+        """Working mode of the image, e.g. "L" or "RGBA"."""
+        return CHANNEL_MODES[1 if len(self.shape) == 2 else self.shape[2]]
+
+    @property
+    def image(self):
+        """The pixel array; read-only, so operations return new arrays."""
+        if self._array is None:
+            if self._decoded is None:
+                if file_signature(self.filepath) != self._stat:
+                    raise RuntimeError(f"{self.filepath} changed on disk since it was loaded")
+                self._decoded = Image.open(self.filepath)
+            with self._decoded as decoded:
+                self._array = freeze(pil_to_array(decoded))
+            self._decoded = None
+        return self._array
+
+    @property
+    def is_file_backed(self):
+        """Check if the pixels can be decoded again from disk"""
+        return self.filepath is not None
+
+    @property
+    def is_mapped(self):
+        """Check if the pixels live in a scratch file rather than in RAM"""
+        return is_mapped(self._array)
+
+    @property
+    def nbytes(self):
+        """Number of bytes held by the decoded pixels, 0 if evicted."""
+        if self._array is None:
+            return 0
+        return self._array.nbytes
+
+    def acquire(self):
+        """Register a holder that needs the pixels and return self."""
+        self.refcount += 1
+        return self
+
+    def release(self):
+        """Unregister a holder; file backed pixels are dropped when unused."""
+        self.refcount = max(0, self.refcount - 1)
+        self.evict()
+
+    def evict(self):
+        """Drop file backed pixels if no holder needs them."""
+        if self.refcount == 0 and self.is_file_backed:
+            self._array = None
+
+    def detach(self):
+        """Keep the pixels resident and stop relying on the file on disk."""
+        if self.is_file_backed:
+            self._array = self.image
+            self.filepath = None
+            self._stat = None
+
+
+def file_signature(filepath):
+    """Modification time and size used to detect a changed file."""
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
@@ -1,76 +1,144 @@
 """Image Manager: Manages image state, history, and metadata."""
 
-from PIL import Image
+import os
 from config.config import settings
+from core.history import History
+from core.image_handle import ImageHandle
+from operations.recipe import Recipe
+from utils.image_converter import pil_to_array
+from utils.out_of_core import decode_to_scratch, is_large
+from utils.tracing import span
 
 
 class ImageManager:
     """Manages image state and history for undo/redo functionality"""
     
     def __init__(self):
-        self.original_image = None
-        self.current_image = None
+        self.original = None  # ImageHandle, held resident for reset
+        self.current = None  # ImageHandle shared with history
         self.filepath = None
         self.filename = settings.messages.no_image
-        self.history = []
-        self.history_index = -1
+        self.saved = None  # handle last loaded or saved, see dirty
+        self.history = History()
+    
+    @property
+    def dirty(self):
+        """Check if the current image differs from the one last loaded or saved"""
+        return self.current is not None and self.current is not self.saved
+    
+    @property
+    def current_image(self):
+        """Current image array, shared and read-only"""
+        return self.current.image if self.current else None
+    
+    @property
+    def original_image(self):
+        """Original image array, shared and read-only"""
+        return self.original.image if self.original else None
     
     def load_image(self, image, filepath):
-        """Load a new image and reset history."""
-        self.original_image = image.copy()
-        self.current_image = image.copy()
+        """Load a newly opened PIL image and reset history."""
+        self.load_handle(self.decode(image, filepath), filepath)
+    
+    @staticmethod
+    def decode(image, filepath, progress=None):
+        """
+        Decode a PIL image into a handle for load_handle().
+        
+        Touches no state, so it can run off the Tk thread for slow files.
+        progress(fraction) is called while very large images are decoded.
+        """
+        if is_large(*image.size):
+            # Decoded once into a scratch file; decoding it again would be slow
+            return ImageHandle(decode_to_scratch(image, progress))
+        if filepath:
+            handle = ImageHandle.from_file(filepath, image)
+            handle.image  # decode now rather than when first displayed
+            return handle
+        return ImageHandle(pil_to_array(image))
+    
+    def load_handle(self, handle, filepath):
+        """Make a decoded handle the image being edited and reset history."""
+        # Current, original and the first history state share one handle.
+        # The original stays acquired so reset never depends on the file,
+        # which may have changed on disk since.
+        previous = self.original
+        self.original = handle.acquire()
+        if previous is not None:
+            previous.release()
+        self.set_current(handle)
+        self.saved = handle
         self.filepath = filepath
-        self.filename = filepath.split("/")[-1] if filepath else settings.messages.no_image
+        self.filename = os.path.basename(filepath) if filepath else settings.messages.no_image
         
         # Reset history with initial state
-        self.history = [self.current_image.copy()]
-        self.history_index = 0
+        self.history.reset(self.current)
+    
+    def mark_saved(self, handle, filepath):
+        """Record that handle was written to filepath."""
+        self.saved = handle
+        self.filepath = filepath
+        self.filename = os.path.basename(filepath)
     
-    def update_image(self, image):
-        """Update current image and add to history."""
-        self.current_image = image.copy()
-        self.add_to_history()
+    def set_current(self, handle):
+        """Make handle the current state, releasing the previous one."""
+        previous = self.current
+        self.current = handle.acquire()
+        if previous is not None:
+            previous.release()
     
-    def add_to_history(self):
+    def update_image(self, image, operation=None, replaces=False):
+        """
+        Update current image and add to history.
+        
+        operation is the history.Operation that produced image from the
+        previous state; without one the state is stored as a checkpoint.
+        replaces means it was applied to the state before the previous one.
+        """
+        self.set_current(ImageHandle(image))
+        self.add_to_history(operation, replaces)
+    
+    def add_to_history(self, operation=None, replaces=False):
         """Add current image state to history for undo/redo"""
-        if not self.current_image:
+        if not self.current:
             return
         
-        # Remove any future states if we're not at the end
-        self.history = self.history[:self.history_index + 1]
-        
-        # Add new state
-        self.history.append(self.current_image.copy())
-        self.history_index += 1
-        
-        # Limit history size
-        if len(self.history) > settings.image_processing.max_undo_history:
-            self.history.pop(0)
-            self.history_index -= 1
+        # Drops redo states, checkpoints when needed and enforces the budget
+        with span("history push", "history"):
+            self.history.push(self.current, operation, replaces)
     
     def undo(self):
         """Undo last operation."""
-        if self.can_undo():
-            self.history_index -= 1
-            self.current_image = self.history[self.history_index].copy()
+        handle = self.history.undo(self.current)
+        if handle is not None:
+            self.set_current(handle)
             return True
         return False
     
     def redo(self):
         """Redo last undone operation."""
-        if self.can_redo():
-            self.history_index += 1
-            self.current_image = self.history[self.history_index].copy()
+        handle = self.history.redo(self.current)
+        if handle is not None:
+            self.set_current(handle)
             return True
         return False
     
     def can_undo(self):
         """Check if undo is available"""
-        return self.history_index > 0
+        return self.history.can_undo()
     
     def can_redo(self):
         """Check if redo is available"""
-        return self.history_index < len(self.history) - 1
+        return self.history.can_redo()
+    
+    def get_history_size(self):
+        """Get the number of bytes currently held by undo/redo history"""
+        return self.history.nbytes
+    
+    def get_recipe(self):
+        """Recipe replaying the edits since loading, or None if one can't be replayed"""
+        steps = self.history.steps()
+        return Recipe(steps) if steps is not None else None
     
     def get_current_image(self):
         """Get the current image"""
@@ -82,29 +150,35 @@ class ImageManager:
     
     def has_image(self):
         """Check if an image is loaded"""
-        return self.current_image is not None
+        return self.current is not None
+    
+    def detach_original(self, filepath):
+        """Keep the original in memory before saving to filepath overwrites its file."""
+        if self.original and self.original.filepath and os.path.abspath(self.original.filepath) == os.path.abspath(filepath):
+            self.original.detach()
     
     def get_image_info(self):
         """Get current image information."""
-        if not self.current_image:
+        if not self.current:
             return {
                 'filename': settings.messages.no_image,
                 'width': 0,
-                'height': 0
+                'height': 0,
+                'mode': None
             }
         
-        width, height = self.current_image.size
+        width, height = self.current.size
         return {
             'filename': self.filename,
             'width': width,
-            'height': height
+            'height': height,
+            'mode': self.current.mode
         }
     
     def reset(self):
         """Reset to original image"""
-        if self.original_image:
-            self.current_image = self.original_image.copy()
-            self.history = [self.current_image.copy()]
-            self.history_index = 0
+        if self.original:
+            self.set_current(self.original)
+            self.history.reset(self.current)
             return True
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,179 @@
+"""Navigation: Step through the images of a directory with background prefetching."""
+
+import os
+from collections import OrderedDict
+from config.config import settings
+from core.file_handler import FileHandler
+from core.image_handle import file_signature
+from core.image_manager import ImageManager
+from core.tasks import BackgroundTasks
+from utils.file_io import supported_extensions
+from utils.out_of_core import is_large
+
+
+def directory_images(filepath):
+    """Sorted paths of the images the editor opens in the directory of filepath."""
+    directory = os.path.dirname(os.path.abspath(filepath))
+    extensions = supported_extensions()
+    try:
+        entries = [
+            entry.path for entry in os.scandir(directory)
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions
+        ]
+    except OSError:
+        return []
+    return sorted(entries, key=lambda path: os.path.basename(path).lower())
+
+
+class DecodedCache:
+    """
+    LRU of decoded ImageHandles by path, bounded by their total bytes.
+
+    Cached handles are acquired so their pixels stay in memory, and are
+    released when evicted. An entry is dropped if its file changed on disk.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # path -> (file signature, handle, bytes)
+        self.nbytes = 0
+
+    def __contains__(self, path):
+        return path in self.entries
+
+    def get(self, path):
+        """The cached handle for path, or None."""
+        entry = self.entries.get(path)
+        if entry is None:
+            return None
+        if entry[0] != file_signature(path):
+            self.remove(path)
+            return None
+        self.entries.move_to_end(path)
+        return entry[1]
+
+    def put(self, path, handle):
+        """Cache handle, evicting the least recently used ones over budget."""
+        # Scratch file images are not worth holding on to
+        if handle.is_mapped or handle.nbytes > self.max_bytes:
+            return
+        self.remove(path)
+        self.entries[path] = (file_signature(path), handle.acquire(), handle.nbytes)
+        self.nbytes += handle.nbytes
+        while self.nbytes > self.max_bytes:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, path):
+        """Drop path from the cache if present."""
+        entry = self.entries.pop(path, None)
+        if entry is not None:
+            self.nbytes -= entry[2]
+            entry[1].release()
+
+    def clear(self):
+        """Drop every cached image."""
+        for path in list(self.entries):
+            self.remove(path)
+
+
+class DirectoryNavigator:
+    """
+    Steps through the images in the directory of the open file.
+
+    Neighbours of the current file are decoded speculatively on their own
+    worker thread into a DecodedCache, so stepping to them shows them at
+    once. A file that is not cached yet is decoded ahead of the others: the
+    jobs are run in order, so neighbour jobs queued before it skip their
+    decode while it is pending and are queued again once it is shown. Only
+    a decode already running finishes first. The file is handed to
+    on_loaded(handle, path) when ready. All methods and callbacks run on the
+    Tk thread.
+    """
+
+    def __init__(self, root, on_loaded, on_error):
+        self.on_loaded = on_loaded
+        self.on_error = on_error
+        self.tasks = BackgroundTasks(root, lambda text: None)
+        self.cache = DecodedCache(settings.navigation.cache_bytes)
+        self.paths = []
+        self.index = None
+        self.target = None  # path to show as soon as it is decoded
+        self.wanted = set()  # paths queued jobs should still decode
+        self.queued = set()
+
+    def set_current(self, filepath):
+        """Make filepath the position in its directory and prefetch around it."""
+        filepath = os.path.abspath(filepath)
+        self.paths = directory_images(filepath)
+        self.index = self.paths.index(filepath) if filepath in self.paths else None
+        self.prefetch()
+
+    def step(self, offset):
+        """Path offset images away from the current one, or None past either end."""
+        if self.index is None:
+            return None
+        index = self.index + offset
+        return self.paths[index] if 0 <= index < len(self.paths) else None
+
+    def open(self, path):
+        """Show path, from the cache if it was prefetched."""
+        handle = self.cache.get(path)
+        if handle is not None:
+            self.target = None
+            self.on_loaded(handle, path)
+            return
+        self.target = path
+        self.prefetch()
+
+    def prefetch(self):
+        """Queue decoding of the target and the neighbours that are not cached."""
+        ahead = settings.navigation.prefetch_ahead
+        behind = settings.navigation.prefetch_behind
+        neighbours = [self.step(offset) for offset in range(1, ahead + 1)]
+        neighbours += [self.step(-offset) for offset in range(1, behind + 1)]
+
+        # Jobs for files no longer wanted finish without decoding
+        self.wanted = {path for path in neighbours if path and path not in self.cache}
+        if self.target:
+            self.wanted.add(self.target)
+        for path in [self.target] + neighbours:
+            if path in self.wanted and path not in self.queued:
+                self.queued.add(path)
+                self.tasks.submit(
+                    lambda progress, path=path: self.decode(path),
+                    lambda handle, path=path: self.decoded(path, handle),
+                    lambda e, path=path: self.failed(path, e)
+                )
+
+    def decode(self, path):
+        """Worker: decode path if it is still wanted and nothing else is waiting, else return None."""
+        target = self.target
+        if path not in self.wanted or (target is not None and path != target):
+            return None
+        image = FileHandler.read_file(path)
+        if path != target and is_large(*image.size):
+            # Too big to decode on speculation
+            image.close()
+            return None
+        return ImageManager.decode(image, path)
+
+    def decoded(self, path, handle):
+        """Cache a decoded file and show it if it is the one asked for."""
+        self.queued.discard(path)
+        if handle is None:
+            if path == self.target:
+                self.prefetch()  # became the target after it was skipped
+            return
+        self.cache.put(path, handle)
+        if path == self.target:
+            self.target = None
+            self.on_loaded(handle, path)
+
+    def failed(self, path, error):
+        """Report a failure to decode the file asked for; neighbours fail quietly."""
+        self.queued.discard(path)
+        if path == self.target:
+            self.target = None
+            self.on_error(error)
+            # Neighbours skipped while it was pending
+            self.prefetch()
@@ -0,0 +1,254 @@
+"""Preview: Display-sized proxies so interactive previews skip full resolution."""
+
+import threading
+import weakref
+from collections import OrderedDict
+import cv2
+from operations.adjustments import compute_histogram
+from operations.filters import BlurPyramid, EdgeGradients
+from utils.image_converter import freeze, image_size
+from utils.out_of_core import is_mapped
+
+
+def make_proxy(image, max_width, max_height):
+    """
+    Shrink image to fit within max_width x max_height.
+
+    Returns the proxy array and the scale factor it was reduced by (1.0 when
+    the image already fits, in which case the image itself is returned).
+    """
+    width, height = image_size(image)
+    scale = min(max_width / width, max_height / height, 1.0)
+    if scale >= 1.0:
+        return image, 1.0
+
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    if is_mapped(image):
+        # Read only every step-th row and column from the scratch file,
+        # leaving area averaging at least two source pixels per output pixel
+        step = max(1, int(1 / scale) // 2)
+        image = image[::step, ::step]
+    proxy = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    return freeze(proxy), scale
+
+
+class ProxyCache:
+    """Caches the proxies of the few images being previewed at once."""
+
+    def __init__(self, capacity=2):
+        self.capacity = capacity
+        # id(image) -> (weakref to image, view size, proxy, scale)
+        self.entries = OrderedDict()
+
+    def get(self, image, max_width, max_height):
+        """Return (proxy, scale) for image, building the proxy on a miss."""
+        key = id(image)
+        entry = self.entries.get(key)
+        if entry and entry[0]() is image and entry[1] == (max_width, max_height):
+            self.entries.move_to_end(key)
+            return entry[2], entry[3]
+
+        proxy, scale = make_proxy(image, max_width, max_height)
+        self.entries[key] = (weakref.ref(image), (max_width, max_height), proxy, scale)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return proxy, scale
+
+    def clear(self):
+        """Drop all cached proxies."""
+        self.entries.clear()
+
+
+class DerivedCache:
+    """Keeps an object built from each of the few proxies being previewed at once."""
+
+    def __init__(self, build, capacity=2):
+        self.build = build
+        self.capacity = capacity
+        # id(image) -> (weakref to image, built object)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()  # used from the preview worker
+
+    def get(self, image):
+        """Return the object built from image, building it on a miss."""
+        key = id(image)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0]() is image:
+                self.entries.move_to_end(key)
+                return entry[1]
+
+            built = self.build(image)
+            self.entries[key] = (weakref.ref(image), built)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+            return built
+
+    def clear(self):
+        """Drop all cached objects."""
+        with self.lock:
+            self.entries.clear()
+
+
+class BlurPyramidCache(DerivedCache):
+    """BlurPyramids of the proxies being previewed, so blur slider moves reuse their levels."""
+
+    def __init__(self, capacity=2):
+        super().__init__(BlurPyramid, capacity)
+
+
+class EdgeGradientsCache(DerivedCache):
+    """EdgeGradients of the proxies being previewed, so threshold moves skip Sobel."""
+
+    def __init__(self, capacity=2):
+        super().__init__(EdgeGradients, capacity)
+
+
+def keeps_histogram(operation):
+    """Check if operation only moves pixels, leaving their values alone"""
+    if operation.name == "rotate":
+        return operation.params["angle"] % 90 == 0
+    return operation.name in ("flip", "orient")
+
+
+class HistogramCache:
+    """
+    Histograms of recent history states, counted on display-sized proxies.
+
+    Entries are keyed by image like ProxyCache and are small, so undo and
+    redo find theirs again. Flips and quarter turns hand their source's
+    histogram on to the result rather than counting again.
+    """
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        # id(image) -> (weakref to image, histogram)
+        self.entries = OrderedDict()
+
+    def get(self, image, proxy):
+        """Return the histogram of image, counting the pixels of proxy() on a miss."""
+        histogram = self.lookup(image)
+        if histogram is None:
+            histogram = compute_histogram(proxy())
+            self.store(image, histogram)
+        return histogram
+
+    def lookup(self, image):
+        """The cached histogram of image, or None."""
+        entry = self.entries.get(id(image))
+        if entry and entry[0]() is image:
+            self.entries.move_to_end(id(image))
+            return entry[1]
+        return None
+
+    def store(self, image, histogram):
+        """Remember histogram for image."""
+        self.entries[id(image)] = (weakref.ref(image), histogram)
+        self.entries.move_to_end(id(image))
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def carry(self, source, result, operation):
+        """Give result the histogram of source if operation keeps the pixel values."""
+        histogram = self.lookup(source)
+        if histogram is not None and keeps_histogram(operation):
+            self.store(result, histogram)
+
+    def clear(self):
+        """Drop all cached histograms."""
+        self.entries.clear()
+
+
+class PreviewRenderer:
+    """
+    Renders previews on a worker thread where the latest request wins.
+
+    submit() replaces any request that has not started yet. A render that
+    is already running is not interrupted: it runs to completion and its
+    result is dropped, so the newest request starts once it finishes.
+    Results, and the exceptions of failed renders for on_error, are handed
+    back on the Tk thread by polling with root.after, so the worker never
+    touches widgets.
+    """
+
+    def __init__(self, root, on_error, poll_interval=15):
+        self.root = root
+        self.on_error = on_error
+        self.poll_interval = poll_interval
+        self.generation = 0
+        self.pending = None  # (generation, render, on_done) not started yet
+        self.result = None  # (generation, value, on_done) ready for the Tk thread
+        self.busy = False
+        self.polling = False
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="preview-renderer", daemon=True)
+        self.thread.start()
+
+    def submit(self, render, on_done):
+        """
+        Queue render() on the worker and pass its result to on_done().
+
+        render must not use Tk; read widget values before submitting.
+        """
+        with self.lock:
+            self.generation += 1
+            self.pending = (self.generation, render, on_done)
+        self.wake.set()
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.poll_interval, self.poll)
+
+    def cancel(self):
+        """Drop queued and running previews, e.g. after an edit is committed."""
+        with self.lock:
+            self.generation += 1
+            self.pending = None
+            self.result = None
+
+    def is_current(self, generation):
+        """Check if no newer request has been submitted since generation"""
+        return generation == self.generation
+
+    def run(self):
+        """Worker loop: render the newest pending request."""
+        while True:
+            self.wake.wait()
+            with self.lock:
+                job = self.pending
+                self.pending = None
+                self.wake.clear()
+                self.busy = job is not None
+            if job is None:
+                continue
+
+            generation, render, on_done = job
+            try:
+                value = render()
+            except Exception as e:
+                value = e
+
+            with self.lock:
+                self.busy = False
+                if self.is_current(generation):
+                    self.result = (generation, value, on_done)
+
+    def poll(self):
+        """Deliver a finished render on the Tk thread and keep polling while busy."""
+        with self.lock:
+            result = self.result
+            self.result = None
+            active = self.busy or self.pending is not None
+
+        if result is not None and self.is_current(result[0]):
+            _, value, on_done = result
+            if isinstance(value, Exception):
+                self.on_error(value)
+            else:
+                on_done(value)
+
+        if active:
+            self.root.after(self.poll_interval, self.poll)
+        else:
+            self.polling = False
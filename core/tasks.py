@@ -0,0 +1,77 @@
+"""Tasks: Slow file work run off the Tk thread."""
+
+import queue
+import threading
+
+
+class BackgroundTasks:
+    """
+    Runs jobs one at a time on a worker thread, in the order submitted.
+
+    A job's work(progress) runs on the worker and may call progress(text)
+    as it goes; the latest text is passed to on_progress on the Tk thread.
+    on_done(result) or on_error(exception) also run on the Tk thread, found
+    by polling with root.after as PreviewRenderer does, so no job touches
+    widgets.
+    """
+
+    def __init__(self, root, on_progress, poll_interval=50):
+        self.root = root
+        self.on_progress = on_progress
+        self.poll_interval = poll_interval
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.pending = 0  # submitted jobs whose callbacks have not run yet
+        self.progress_text = None
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name="file-tasks", daemon=True)
+        self.thread.start()
+
+    @property
+    def busy(self):
+        """Check if any job is queued or running"""
+        return self.pending > 0
+
+    def submit(self, work, on_done, on_error):
+        """Queue work(progress) and call on_done or on_error with the outcome."""
+        self.pending += 1
+        self.jobs.put((work, on_done, on_error))
+        if self.pending == 1:
+            self.root.after(self.poll_interval, self.poll)
+
+    def report(self, text):
+        """Record progress from the worker for the next poll."""
+        with self.lock:
+            self.progress_text = text
+
+    def run(self):
+        """Worker loop: run jobs in order."""
+        while True:
+            work, on_done, on_error = self.jobs.get()
+            try:
+                outcome = (on_done, work(self.report))
+            except Exception as e:
+                outcome = (on_error, e)
+            # Progress of a finished job must not show after its callback
+            with self.lock:
+                self.progress_text = None
+            self.results.put(outcome)
+
+    def poll(self):
+        """Show progress and deliver finished jobs on the Tk thread."""
+        with self.lock:
+            text = self.progress_text
+            self.progress_text = None
+        if text is not None:
+            self.on_progress(text)
+
+        while True:
+            try:
+                callback, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            callback(value)
+
+        if self.pending:
+            self.root.after(self.poll_interval, self.poll)
@@ -1,7 +1,36 @@
-import tkinter as tk
-from core.app import ImageEditorApp
+import sys
+import threading
+
+
+def preload():
+    """Import the heavy modules while the window is being shown."""
+    # Imported only to fill the module cache for core.app, never used here
+    import numpy  # noqa: F401
+    import cv2  # noqa: F401
+    from PIL import ImageTk  # noqa: F401
+
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["batch"]:
+        # Headless: the GUI modules and Tk are never imported
+        from core.batch import main
+        sys.exit(main(sys.argv[2:]))
+
+    threading.Thread(target=preload, name="preload", daemon=True).start()
+
+    import tkinter as tk
+    from config.config import settings
+
+    # Paint the window before importing the editor, which needs OpenCV
     root = tk.Tk()
+    root.title(settings.window.title)
+    root.geometry(f"{settings.window.width}x{settings.window.height}")
+    loading = tk.Label(root, text="Loading...", fg="gray", font=("Arial", 14))
+    loading.place(relx=0.5, rely=0.5, anchor="center")
+    root.update()
+
+    from core.app import ImageEditorApp
+
     app = ImageEditorApp(root)
-    root.mainloop()
\ No newline at end of file
+    loading.destroy()
+    root.mainloop()
@@ -1,37 +1,265 @@
+from functools import partial
 import cv2
 import numpy as np
-from PIL import Image
-from utils.image_converter import pil_to_cv2, cv2_to_pil
+from operations.tiling import process_tiled
+from utils.image_converter import has_alpha, merge_alpha, split_alpha
+from utils.out_of_core import output_for
+
+
+IDENTITY = np.arange(256, dtype=np.uint8)
 
 
 def adjust_brightness(image, value):
     """Adjust image brightness."""
-    img_cv = pil_to_cv2(image)
-    # Reduced sensitivity: straight mapping matches slider -100 to 100
-    brightness = value
-    result = cv2.convertScaleAbs(img_cv, alpha=1.0, beta=brightness)
-    return cv2_to_pil(result)
+    return apply_adjustments(image, brightness=value)
 
 
 def adjust_contrast(image, value):
     """Adjust image contrast."""
-    img_cv = pil_to_cv2(image)
-    # Reduced sensitivity: max 1.5x contrast instead of 2.0x
-    alpha = 1.0 + (value / 200.0)
-    result = cv2.convertScaleAbs(img_cv, alpha=alpha, beta=0)
-    return cv2_to_pil(result)
+    return apply_adjustments(image, contrast=value)
 
 
 def adjust_saturation(image, value):
     """Adjust image saturation. value in range -100..100 (0 = no change)."""
-    img_cv = pil_to_cv2(image)
-    hsv = cv2.cvtColor(img_cv, cv2.COLOR_BGR2HSV).astype("float32")
+    return apply_adjustments(image, saturation=value)
+
+
+def build_tone_lut(brightness=0, contrast=0):
+    """256-entry table for brightness followed by contrast."""
+    # Built with convertScaleAbs itself so rounding matches it exactly
+    values = np.arange(256, dtype=np.uint8).reshape(1, 256)
+    if brightness != 0:
+        # Reduced sensitivity: straight mapping matches slider -100 to 100
+        values = cv2.convertScaleAbs(values, alpha=1.0, beta=brightness)
+    if contrast != 0:
+        # Reduced sensitivity: max 1.5x contrast instead of 2.0x
+        alpha = 1.0 + (contrast / 200.0)
+        values = cv2.convertScaleAbs(values, alpha=alpha, beta=0)
+    return values.ravel()
 
+
+def build_saturation_lut(saturation=0):
+    """256-entry table for the HSV saturation channel."""
     # scale factor: -100 -> 0, 0 -> 1, 100 -> 2
-    scale = 1.0 + (float(value) / 100.0)
-    h, s, v = cv2.split(hsv)
-    s *= scale
-    s = np.clip(s, 0, 255)
-    hsv_scaled = cv2.merge([h, s, v])
-    result = cv2.cvtColor(hsv_scaled.astype("uint8"), cv2.COLOR_HSV2BGR)
-    return cv2_to_pil(result)
+    scale = np.float32(1.0 + (float(saturation) / 100.0))
+    values = np.arange(256, dtype=np.float32) * scale
+    return np.clip(values, 0, 255).astype(np.uint8)
+
+
+def apply_adjustments(image, brightness=0, contrast=0, saturation=0):
+    """
+    Apply brightness, contrast and saturation in that order, skipping zeros.
+
+    The slider values are turned into lookup tables, so brightness and
+    contrast cost one table pass over the pixels and saturation one more
+    pass on the uint8 HSV buffer.
+    """
+    stages = adjustment_stages(brightness, contrast, saturation)
+    if not stages:
+        return image
+
+    # Per-pixel, so tiles need no halo
+    return process_tiled(image, partial(adjust_tile, stages=stages))
+
+
+def adjustment_stages(brightness=0, contrast=0, saturation=0):
+    """
+    Lookup table stages for adjust_tile, skipping zeros.
+
+    A ("tone", table) stage maps every channel, a ("saturation", table)
+    stage maps the channels of the HSV image.
+    """
+    stages = []
+    if brightness != 0 or contrast != 0:
+        stages.append(("tone", build_tone_lut(brightness, contrast)))
+    if saturation != 0:
+        # Hue and value pass through unchanged
+        stages.append(("saturation", np.dstack([IDENTITY, build_saturation_lut(saturation), IDENTITY])))
+    return stages
+
+
+def adjust_tile(tile, stages):
+    """Apply lookup table stages to one tile, leaving alpha alone."""
+    for kind, table in stages:
+        if kind in ("tone", "levels"):
+            tile = cv2.LUT(tile, channel_table(table, tile))
+        elif kind == "saturation" and tile.ndim == 3 and tile.shape[2] >= 3:
+            # Grey tiles have no saturation to change
+            color, alpha = split_alpha(tile)
+            hsv = cv2.cvtColor(color, cv2.COLOR_RGB2HSV)
+            tile = merge_alpha(hsv_to_rgb(cv2.LUT(hsv, table)), alpha)
+    return tile
+
+
+def channel_table(table, tile):
+    """
+    A tone or levels table shaped for cv2.LUT on tile.
+
+    Levels tables have a column per RGB channel, and grey tiles get the
+    mean of the three. Alpha is mapped to itself.
+    """
+    columns = table.reshape(256, -1)
+    color_channels = (1 if tile.ndim == 2 else tile.shape[2]) - has_alpha(tile)
+    if color_channels == 1 and columns.shape[1] == 3:
+        columns = np.rint(columns.mean(axis=1, keepdims=True)).astype(np.uint8)
+    if not has_alpha(tile):
+        return columns[:, 0] if columns.shape[1] == 1 else table
+    color = [columns[:, min(index, columns.shape[1] - 1)] for index in range(color_channels)]
+    return np.dstack(color + [IDENTITY])
+
+
+# Rows of the histogram array
+RED, GREEN, BLUE, LUMINANCE = range(4)
+
+
+def compute_histogram(image):
+    """
+    Count the values of each channel: a (4, 256) array of red, green, blue
+    and luminance counts.
+
+    Alpha is not counted, and all four rows of a grey image are its grey
+    counts.
+    """
+    color, _ = split_alpha(image)
+    histogram = np.zeros((4, 256), dtype=np.int64)
+    # calcHist counts in float32, exact up to 2 ** 24 pixels at a time;
+    # bands also spare large images a full-size luminance array
+    band = max(1, 2 ** 24 // image.shape[1])
+    for top in range(0, image.shape[0], band):
+        rows = np.ascontiguousarray(color[top:top + band])
+        if rows.ndim == 2:
+            histogram += count_values(rows, 0)
+            continue
+        for channel in (RED, GREEN, BLUE):
+            histogram[channel] += count_values(rows, channel)
+        histogram[LUMINANCE] += count_values(cv2.cvtColor(rows, cv2.COLOR_RGB2GRAY), 0)
+    return histogram
+
+
+def count_values(image, channel):
+    """256 counts of the values in one channel of image."""
+    return cv2.calcHist([image], [channel], None, [256], [0, 256]).ravel().astype(np.int64)
+
+
+def clip_points(counts, clip=0.5):
+    """
+    (black, white) values of a histogram row with clip percent of the
+    pixels at or beyond each, (0, 255) for a flat image.
+    """
+    cumulative = np.cumsum(counts)
+    cut = cumulative[-1] * clip / 100
+    black = int(np.argmax(cumulative > cut))
+    white = int(np.argmax(cumulative >= cumulative[-1] - cut))
+    if white <= black:
+        return 0, 255
+    return black, white
+
+
+def auto_levels_params(histogram, clip=0.5):
+    """Levels parameters stretching each colour channel separately."""
+    points = [clip_points(histogram[channel], clip) for channel in (RED, GREEN, BLUE)]
+    return levels_params([black for black, _ in points], [white for _, white in points])
+
+
+def auto_contrast_params(histogram, clip=0.5):
+    """Levels parameters stretching the luminance, keeping the colour balance."""
+    black, white = clip_points(histogram[LUMINANCE], clip)
+    return levels_params([black] * 3, [white] * 3)
+
+
+def levels_params(blacks, whites):
+    """Keyword arguments of apply_levels for per-channel black and white points."""
+    params = {}
+    for channel, black, white in zip(("red", "green", "blue"), blacks, whites):
+        params[f"black_{channel}"] = black
+        params[f"white_{channel}"] = white
+    return params
+
+
+def build_levels_lut(blacks, whites):
+    """Per-channel table mapping black to 0 and white to 255, for cv2.LUT."""
+    values = np.arange(256, dtype=np.float32)
+    tables = []
+    for black, white in zip(blacks, whites):
+        scale = 255.0 / max(1, white - black)
+        tables.append(np.clip(np.rint((values - black) * scale), 0, 255).astype(np.uint8))
+    return np.dstack(tables)
+
+
+def levels_stages(black_red=0, black_green=0, black_blue=0, white_red=255, white_green=255, white_blue=255):
+    """A ("levels", table) stage for adjust_tile, none for the identity."""
+    blacks = (black_red, black_green, black_blue)
+    whites = (white_red, white_green, white_blue)
+    if blacks == (0, 0, 0) and whites == (255, 255, 255):
+        return []
+    return [("levels", build_levels_lut(blacks, whites))]
+
+
+def apply_levels(image, black_red=0, black_green=0, black_blue=0, white_red=255, white_green=255, white_blue=255):
+    """Stretch each channel so its black point maps to 0 and white point to 255."""
+    stages = levels_stages(black_red, black_green, black_blue, white_red, white_green, white_blue)
+    if not stages:
+        return image
+    return process_tiled(image, partial(adjust_tile, stages=stages))
+
+
+def apply_auto_levels(image, clip=0.5):
+    """Stretch each channel to the full range, clipping clip percent at either end."""
+    return apply_levels(image, **auto_levels_params(compute_histogram(image), clip))
+
+
+def apply_auto_contrast(image, clip=0.5):
+    """Stretch all channels alike by the luminance range, clipping clip percent."""
+    return apply_levels(image, **auto_contrast_params(compute_histogram(image), clip))
+
+
+def apply_clahe(image, clip_limit=2.0, grid=8):
+    """
+    Contrast limited adaptive histogram equalisation of the lightness.
+
+    Equalises L of the Lab image over a grid x grid layout of regions,
+    leaving the colours alone; grey images are equalised directly. Regions
+    span the whole image, so it is not tiled.
+    """
+    color, alpha = split_alpha(image)
+    clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(grid, grid))
+    # Straight into the result when there is no alpha to add back
+    dst = output_for(image, image.shape) if alpha is None else None
+    if color.ndim == 2:
+        equalised = clahe.apply(np.ascontiguousarray(color), dst=dst)
+    else:
+        lab = cv2.cvtColor(color, cv2.COLOR_RGB2LAB)
+        lightness, a, b = cv2.split(lab)
+        lab = cv2.merge([clahe.apply(lightness), a, b])
+        equalised = cv2.cvtColor(lab, cv2.COLOR_LAB2RGB, dst=dst)
+    return merge_alpha(equalised, alpha, out=output_for(image, image.shape))
+
+
+# Pixels per row for hsv_to_rgb, a multiple of OpenCV's vector width
+HSV_ROW = 1024
+
+
+def hsv_to_rgb(hsv):
+    """
+    Convert HSV to RGB the same way wherever a pixel sits in the image.
+
+    OpenCV's vectorised HSV to RGB conversion rounds differently from the
+    scalar code it uses for the last pixels of a row, so results would
+    depend on the image width, tiling and crops. The pixels are converted
+    as rows of HSV_ROW with the remainder padded to a full row.
+    """
+    height, width = hsv.shape[:2]
+    count = height * width
+    flat = np.ascontiguousarray(hsv).reshape(-1, 3)
+    rgb = np.empty_like(flat)
+
+    whole = count - count % HSV_ROW
+    if whole:
+        rows = whole // HSV_ROW
+        cv2.cvtColor(flat[:whole].reshape(rows, HSV_ROW, 3), cv2.COLOR_HSV2RGB,
+                     dst=rgb[:whole].reshape(rows, HSV_ROW, 3))
+    if whole < count:
+        tail = np.zeros((1, HSV_ROW, 3), dtype=hsv.dtype)
+        tail[0, :count - whole] = flat[whole:]
+        rgb[whole:] = cv2.cvtColor(tail, cv2.COLOR_HSV2RGB)[0, :count - whole]
+    return rgb.reshape(hsv.shape)
@@ -1,29 +1,95 @@
+import math
+from functools import partial
 import cv2
-from utils.image_converter import pil_to_cv2, cv2_to_pil
+import numpy as np
+from operations.tiling import process_tiled
+from utils.image_converter import has_alpha, merge_alpha, split_alpha
+from utils.out_of_core import output_for
+
+
+# Up to this intensity blur is an exact Gaussian (kernels of 3-31 px); above
+# it, stacked box blurs whose cost per pixel does not depend on the radius
+GAUSSIAN_MAX_INTENSITY = 15
+BOX_PASSES = 3
 
 def apply_grayscale(image):
     """
     Apply grayscale filter to the image.
+
+    The result has one grey channel plus any alpha (L or LA), a third of
+    the memory of RGB; grey images are returned as they are.
     """
-    img_cv= pil_to_cv2(image)
-    gray= cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
+    if split_alpha(image)[0].ndim == 2:
+        return image
+    return process_tiled(image, grayscale_tile)
 
-    result= cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
-    from PIL import Image
-    return Image.fromarray(result)
+
+def grayscale_tile(tile):
+    """
+    Grayscale one tile, keeping its alpha.
+    """
+    if split_alpha(tile)[0].ndim == 2:
+        return tile
+    alpha = tile[:, :, 3] if has_alpha(tile) else None
+    gray = cv2.cvtColor(tile, cv2.COLOR_RGBA2GRAY if alpha is not None else cv2.COLOR_RGB2GRAY)
+    return merge_alpha(gray, alpha)
 
 
-def apply_blur(image, intensity):
+def apply_blur(image, intensity, scale=1.0):
     """
     Apply Gaussian blur to the image.
-    """
-    # Ensure RGB and convert to OpenCV BGR
-    img_cv = pil_to_cv2(image)
 
+    scale is the factor the image was shrunk by, so a preview on a
+    downscaled proxy looks like the blur of the full-resolution image.
+    Intensities above GAUSSIAN_MAX_INTENSITY approximate the Gaussian with
+    BOX_PASSES box blurs, so large radii cost no more than small ones.
+    """
     # If intensity is 0, return image unchanged
     if int(intensity) <= 0:
         return image
 
+    if int(intensity) > GAUSSIAN_MAX_INTENSITY:
+        radii = box_radii(blur_sigma(intensity) * scale)
+        # Each pass reaches its own radius further
+        return process_tiled(image, partial(box_blur_tile, radii=radii), halo=sum(radii))
+
+    k_size, sigma = blur_kernel(intensity, scale)
+    # Halo is the kernel radius
+    blurred = process_tiled(image, partial(blur_tile, k_size=k_size, sigma=sigma), halo=k_size // 2)
+    return blurred
+
+
+def blur_sigma(intensity):
+    """Gaussian sigma, in full-resolution pixels, of a blur intensity."""
+    intensity = int(intensity)
+    if intensity <= GAUSSIAN_MAX_INTENSITY:
+        # The sigma OpenCV derives from the kernel size
+        k_size = blur_kernel(intensity)[0]
+        return 0.3 * ((k_size - 1) * 0.5 - 1) + 0.8
+    # Continues the Gaussian range smoothly, reaching ~220 px at 100
+    return blur_sigma(GAUSSIAN_MAX_INTENSITY) * (intensity / GAUSSIAN_MAX_INTENSITY) ** 2
+
+
+def box_radii(sigma, passes=BOX_PASSES):
+    """
+    Radii of passes box blurs that together approximate a Gaussian of sigma.
+
+    Box widths are the two odd sizes around the ideal width, mixed so the
+    combined variance matches sigma squared.
+    """
+    variance = 12 * sigma * sigma
+    lower = int(math.sqrt(variance / passes + 1))
+    if lower % 2 == 0:
+        lower -= 1
+    lower_count = round((variance - passes * lower * lower - 4 * passes * lower - 3 * passes) / (-4 * lower - 4))
+    lower_count = min(passes, max(0, lower_count))
+    return [(lower if index < lower_count else lower + 2) // 2 for index in range(passes)]
+
+
+def blur_kernel(intensity, scale=1.0):
+    """
+    Gaussian kernel size and sigma (0 = derived by OpenCV) for a blur intensity.
+    """
     # Map slider 1–15 to strong, perceptible kernel sizes 3–31 (odd numbers)
     k_size = max(1, int(intensity))
     # force odd
@@ -32,22 +98,147 @@ def apply_blur(image, intensity):
     # scale up to make blur visible even on high-res images
     k_size = min(31, k_size * 2 + 1)  # 1->3, 5->11, 10->21, 15->31
 
-    blurred = cv2.GaussianBlur(img_cv, (k_size, k_size), 0)
-    return cv2_to_pil(blurred)
+    sigma = 0
+    if scale != 1.0:
+        # Same sigma OpenCV derives from k_size, scaled to the proxy and
+        # with the kernel size OpenCV would pick for that sigma
+        sigma = (0.3 * ((k_size - 1) * 0.5 - 1) + 0.8) * scale
+        k_size = int(round(sigma * 3 * 2 + 1)) | 1
+    return k_size, sigma
+
+
+def blur_radius(intensity):
+    """How far, in pixels, a full-resolution blur of intensity reaches."""
+    if int(intensity) <= 0:
+        return 0
+    if int(intensity) > GAUSSIAN_MAX_INTENSITY:
+        return sum(box_radii(blur_sigma(intensity)))
+    return blur_kernel(intensity)[0] // 2
+
+
+def blur_tile(tile, k_size, sigma):
+    """
+    Gaussian blur one tile.
+    """
+    return cv2.GaussianBlur(tile, (k_size, k_size), sigma)
+
+
+def box_blur_tile(tile, radii):
+    """
+    Box blur one tile once per radius; OpenCV's running sums make each pass
+    cost the same whatever the radius.
+    """
+    for radius in radii:
+        if radius > 0:
+            tile = cv2.blur(tile, (2 * radius + 1, 2 * radius + 1))
+    return tile
+
+
+class BlurPyramid:
+    """
+    Blurs of one image at any intensity, for live previews.
+
+    Large blurs run on a pyrDown level of the image, where the same blur
+    covers fewer pixels, and are scaled back up, so a preview costs less
+    as the radius grows. Levels are built on first use and kept, so moving
+    the blur slider only repeats the blur itself. Applying a blur still
+    uses apply_blur at full resolution.
+    """
+
+    # Smallest sigma left to blur on a level; below it a level adds blockiness
+    MIN_LEVEL_SIGMA = 4.0
+    MIN_LEVEL_SIZE = 16
+
+    def __init__(self, image):
+        self.levels = [image]
+
+    def level(self, index):
+        """The image halved index times."""
+        while len(self.levels) <= index:
+            self.levels.append(cv2.pyrDown(self.levels[-1]))
+        return self.levels[index]
+
+    def blur(self, intensity, scale=1.0):
+        """The image blurred like apply_blur(image, intensity, scale)."""
+        if int(intensity) <= 0:
+            return self.levels[0]
+
+        sigma = blur_sigma(intensity) * scale
+        height, width = self.levels[0].shape[:2]
+        index = 0
+        while (sigma / 2 ** (index + 1) >= self.MIN_LEVEL_SIGMA
+               and min(width, height) >> (index + 1) >= self.MIN_LEVEL_SIZE):
+            index += 1
+        if index == 0:
+            return apply_blur(self.levels[0], intensity, scale)
 
+        small = apply_blur(self.level(index), intensity, scale / 2 ** index)
+        return cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
 
-def apply_edge_detection(image):
+
+def apply_edge_detection(image, low=50, high=150, aperture=3):
     """
     Apply Canny edge detection.
+
+    low and high are the hysteresis thresholds and aperture the Sobel
+    kernel size (3, 5 or 7). The edges are a grey image, keeping any
+    alpha. Not tiled: hysteresis follows edges across the whole frame. A
+    mapped image still gets mapped outputs, but Canny's gradient buffers
+    are in RAM.
+    """
+    color, alpha = split_alpha(image)
+    # Straight into the result when there is no alpha to add back
+    dst = output_for(image, image.shape[:2]) if alpha is None else None
+    edges = cv2.Canny(np.ascontiguousarray(color), low, high, apertureSize=aperture, edges=dst)
+    return merge_alpha(edges, alpha, out=output_for(image, image.shape[:2] + (2,)))
+
+
+def sobel_gradients(image, aperture=3):
+    """
+    Horizontal and vertical derivatives as Canny computes them.
+
+    For colour images each pixel takes the derivatives of the channel
+    with the largest gradient magnitude (|dx| + |dy|), first channel on
+    ties. Aperture 7 is scaled down by 16 to fit 16 bits, as in Canny.
     """
-    img_cv= pil_to_cv2(image)
-    #Adjusted Canny thresholds for better visibility on average images
-    
-    edges= cv2.Canny(img_cv,50, 150)
-    # Convert single channel edges to RGB  for consistency
-    result= cv2.cvtColor(edges, cv2.COLOR_GRAY2RGB)
-    from PIL import Image
-    return Image.fromarray(result)
-    
-
-    
+    scale = 1 / 16 if aperture == 7 else 1
+    channels = cv2.split(image) if image.ndim == 3 else [image]
+    dx = dy = magnitude = None
+    for channel in channels:
+        channel_dx = cv2.Sobel(channel, cv2.CV_16S, 1, 0, ksize=aperture, scale=scale, borderType=cv2.BORDER_REPLICATE)
+        channel_dy = cv2.Sobel(channel, cv2.CV_16S, 0, 1, ksize=aperture, scale=scale, borderType=cv2.BORDER_REPLICATE)
+        if dx is None:
+            dx, dy = channel_dx, channel_dy
+            if len(channels) > 1:
+                magnitude = np.abs(dx) + np.abs(dy)
+            continue
+        channel_magnitude = np.abs(channel_dx) + np.abs(channel_dy)
+        larger = cv2.compare(channel_magnitude, magnitude, cv2.CMP_GT)
+        cv2.copyTo(channel_dx, larger, dx)
+        cv2.copyTo(channel_dy, larger, dy)
+        cv2.max(channel_magnitude, magnitude, magnitude)
+    return dx, dy
+
+
+class EdgeGradients:
+    """
+    Sobel derivatives of one image, for Canny at any thresholds.
+
+    The derivatives are most of Canny's cost and are kept per aperture,
+    so moving a threshold slider only repeats non-maximum suppression and
+    hysteresis. Edges match apply_edge_detection exactly.
+    """
+
+    def __init__(self, image):
+        self.image, self.alpha = split_alpha(image)
+        self.gradients = {}  # aperture -> (dx, dy)
+
+    def edges(self, low, high, aperture=3):
+        """The image's edges like apply_edge_detection(image, low, high, aperture)."""
+        if aperture not in self.gradients:
+            self.gradients[aperture] = sobel_gradients(self.image, aperture)
+        dx, dy = self.gradients[aperture]
+        if aperture == 7:
+            # Canny scales its thresholds with the derivatives
+            low, high = low / 16, high / 16
+        return merge_alpha(cv2.Canny(dx, dy, low, high), self.alpha)
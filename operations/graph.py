@@ -0,0 +1,276 @@
+"""Graph: Lazily collected operations, simplified before any pixel is touched."""
+
+from functools import partial
+import numpy as np
+from operations import adjustments, filters, registry, transforms
+from operations.tiling import process_tiled
+from utils.image_converter import image_size
+
+
+# Coordinate matrices (x right, y down, centred) of the building blocks of
+# transforms.ORIENTATIONS
+TRANSPOSE = np.array([[0, 1], [1, 0]])
+FLIP_X = np.array([[-1, 0], [0, 1]])
+FLIP_Y = np.array([[1, 0], [0, -1]])
+QUARTER_TURN = FLIP_X @ TRANSPOSE  # 90° clockwise
+
+ADJUSTMENT_PARAMS = {
+    "brightness": lambda params: {"brightness": params["value"]},
+    "contrast": lambda params: {"contrast": params["value"]},
+    "saturation": lambda params: {"saturation": params["value"]},
+    "adjust": dict,
+}
+
+
+def orientation_matrix(orientation):
+    """Coordinate matrix of a transforms.ORIENTATIONS key."""
+    transpose, flip_x, flip_y = transforms.ORIENTATIONS[orientation]
+    matrix = TRANSPOSE if transpose else np.eye(2, dtype=int)
+    if flip_x:
+        matrix = FLIP_X @ matrix
+    if flip_y:
+        matrix = FLIP_Y @ matrix
+    return matrix
+
+
+def orientation_from_matrix(matrix):
+    """transforms.ORIENTATIONS key of a coordinate matrix."""
+    for orientation in transforms.ORIENTATIONS:
+        if np.array_equal(orientation_matrix(orientation), matrix):
+            return orientation
+    raise ValueError("Not an orientation matrix")
+
+
+class Node:
+    """
+    One step of a plan.
+
+    kind is "orient" (data: ORIENTATIONS key), "crop" (data: box),
+    "pointwise" (data: tile stages), "blur" (data: intensity) or "op"
+    (data: (name, params)) for anything the planner leaves alone.
+    """
+
+    def __init__(self, kind, data):
+        self.kind = kind
+        self.data = data
+
+    def __repr__(self):
+        if self.kind == "pointwise":
+            return f"pointwise({', '.join(kind for kind, _ in self.data)})"
+        return f"{self.kind}({self.data})"
+
+    def output_size(self, size):
+        """(width, height) this node produces from an input of size."""
+        width, height = size
+        if self.kind == "orient":
+            return (height, width) if transforms.ORIENTATIONS[self.data][0] else size
+        if self.kind == "crop":
+            left, top, right, bottom = self.data
+            return right - left, bottom - top
+        if self.kind == "op":
+            name, params = self.data
+            if name == "resize":
+                return params["width"], params["height"]
+            if name == "rotate":
+                angle = params["angle"] % 360
+                if angle == 0:
+                    return size
+                if angle % 90 == 0:
+                    return (height, width) if angle % 180 else size
+                return transforms.rotation_matrix(width, height, angle)[1]
+        return size
+
+
+def to_node(name, params):
+    """Plan node for one registered step."""
+    if name == "rotate" and params["angle"] % 90 == 0:
+        turns = int(params["angle"] % 360) // 90
+        return Node("orient", orientation_from_matrix(np.linalg.matrix_power(QUARTER_TURN, turns)))
+    if name == "flip":
+        return Node("orient", "flip_horizontal" if params["direction"] == "horizontal" else "flip_vertical")
+    if name == "orient":
+        return Node("orient", params["orientation"])
+    if name == "crop":
+        return Node("crop", (params["left"], params["top"], params["right"], params["bottom"]))
+    if name == "grayscale":
+        return Node("pointwise", [("grayscale", None)])
+    if name in ADJUSTMENT_PARAMS:
+        return Node("pointwise", adjustments.adjustment_stages(**ADJUSTMENT_PARAMS[name](params)))
+    if name == "levels":
+        return Node("pointwise", adjustments.levels_stages(**params))
+    if name == "blur":
+        if params["intensity"] <= 0:
+            return Node("pointwise", [])
+        return Node("blur", params["intensity"])
+    return Node("op", (name, params))
+
+
+def unorient_box(box, orientation, size):
+    """Map a box in the output of an orientation back to its input of size."""
+    transpose, flip_x, flip_y = transforms.ORIENTATIONS[orientation]
+    width, height = (size[1], size[0]) if transpose else size
+    left, top, right, bottom = box
+    if flip_x:
+        left, right = width - right, width - left
+    if flip_y:
+        top, bottom = height - bottom, height - top
+    if transpose:
+        left, top, right, bottom = top, left, bottom, right
+    return left, top, right, bottom
+
+
+class LazyImage:
+    """
+    An image plus the operations still to be applied to it.
+
+    compute() simplifies the operations before running them: quarter turns
+    and flips collapse into one orientation, crops move ahead of per-pixel
+    operations, orientations and blurs (with a halo of the blur radius) so
+    those run on fewer pixels, and neighbouring per-pixel operations fuse
+    into one tiled pass with composed lookup tables. Every rewrite gives
+    exactly the result of applying the operations one by one.
+    """
+
+    def __init__(self, image):
+        self.image = image
+        self.steps = []
+
+    def apply(self, name, **params):
+        """Queue a registered operation and return self."""
+        self.steps.append((name, registry.get(name).bind(params)))
+        return self
+
+    def plan(self):
+        """The simplified list of Nodes compute() would run."""
+        plan = []
+        for name, params in self.steps:
+            self.add(plan, to_node(name, params))
+        return plan
+
+    def compute(self):
+        """Run the simplified plan and return the resulting image."""
+        plan = self.plan()
+        image = self.image
+        for index, node in enumerate(plan):
+            last = index == len(plan) - 1
+            image = self.run(node, image, last)
+        if not image.flags.c_contiguous:
+            # A crop view that no later node copied
+            image = transforms.crop_image(image, 0, 0, *image_size(image))
+        return image
+
+    def sizes(self, plan):
+        """Input (width, height) of every node in plan, then the output size."""
+        sizes = [image_size(self.image)]
+        for node in plan:
+            sizes.append(node.output_size(sizes[-1]))
+        return sizes
+
+    def add(self, plan, node):
+        """Append node to plan, merging or reordering where it is exact."""
+        if node.kind == "crop":
+            self.push_crop(plan, node.data)
+            return
+
+        if node.kind == "pointwise":
+            # Per-pixel operations commute with orientations, so look past
+            # them for another per-pixel node to fuse with
+            index = len(plan)
+            while index > 0 and plan[index - 1].kind == "orient":
+                index -= 1
+            if index > 0 and plan[index - 1].kind == "pointwise":
+                plan[index - 1] = Node("pointwise", fuse_stages(plan[index - 1].data + node.data))
+                return
+            if not node.data:
+                return
+
+        if node.kind == "orient" and plan and plan[-1].kind == "orient":
+            matrix = orientation_matrix(node.data) @ orientation_matrix(plan[-1].data)
+            plan[-1] = Node("orient", orientation_from_matrix(matrix))
+            if plan[-1].data == "identity":
+                plan.pop()
+            return
+
+        if node.kind == "orient" and node.data == "identity":
+            return
+        plan.append(node)
+
+    def push_crop(self, plan, box):
+        """Insert a crop of the plan's output as early in plan as possible."""
+        sizes = self.sizes(plan)
+        # Crop boxes beyond the image are clipped, as slicing would
+        width, height = sizes[-1]
+        left, top, right, bottom = box
+        box = (min(left, width), min(top, height), min(right, width), min(bottom, height))
+        if box[0] >= box[2] or box[1] >= box[3]:
+            raise ValueError("Crop box does not overlap the image")
+
+        index = len(plan)
+        while index > 0:
+            node, size = plan[index - 1], sizes[index - 1]
+            if node.kind == "pointwise":
+                pass
+            elif node.kind == "orient":
+                box = unorient_box(box, node.data, size)
+            elif node.kind == "crop":
+                # Two crops are one crop of the first's input
+                offset_x, offset_y = node.data[:2]
+                box = (box[0] + offset_x, box[1] + offset_y, box[2] + offset_x, box[3] + offset_y)
+                del plan[index - 1]
+                del sizes[index - 1]
+            elif node.kind == "blur":
+                # Blur the crop plus its halo, then trim the halo again
+                radius = filters.blur_radius(node.data)
+                outer = (
+                    max(0, box[0] - radius), max(0, box[1] - radius),
+                    min(size[0], box[2] + radius), min(size[1], box[3] + radius)
+                )
+                inner = (box[0] - outer[0], box[1] - outer[1], box[2] - outer[0], box[3] - outer[1])
+                if inner != (0, 0, outer[2] - outer[0], outer[3] - outer[1]):
+                    plan.insert(index, Node("crop", inner))
+                box = outer
+            else:
+                break
+            index -= 1
+
+        if box != (0, 0) + tuple(sizes[index]):
+            plan.insert(index, Node("crop", box))
+
+    @staticmethod
+    def run(node, image, last):
+        """Apply one plan node to image."""
+        if node.kind == "orient":
+            return transforms.orient_image(image, node.data)
+        if node.kind == "crop":
+            if last:
+                return transforms.crop_image(image, *node.data)
+            # Later nodes write new arrays, so a view is enough
+            left, top, right, bottom = node.data
+            return image[top:bottom, left:right]
+        if node.kind == "pointwise":
+            return process_tiled(image, partial(pointwise_tile, stages=node.data))
+        if node.kind == "blur":
+            return filters.apply_blur(image, node.data)
+        name, params = node.data
+        return registry.get(name).apply(image, params)
+
+
+def fuse_stages(stages):
+    """Compose neighbouring tone tables into one."""
+    fused = []
+    for kind, table in stages:
+        if kind == "tone" and fused and fused[-1][0] == "tone":
+            fused[-1] = ("tone", table[fused[-1][1]])
+        else:
+            fused.append((kind, table))
+    return fused
+
+
+def pointwise_tile(tile, stages):
+    """Apply fused per-pixel stages to one tile."""
+    for stage in stages:
+        if stage[0] == "grayscale":
+            tile = filters.grayscale_tile(tile)
+        else:
+            tile = adjustments.adjust_tile(tile, [stage])
+    return tile
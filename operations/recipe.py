@@ -0,0 +1,93 @@
+"""Recipe: A saved sequence of registered operations that can be replayed."""
+
+import json
+import os
+import tomllib
+from operations import registry
+from operations.graph import LazyImage
+
+
+RECIPE_VERSION = 1
+
+
+class Recipe:
+    """
+    Ordered list of (operation name, params) steps.
+
+    Stored as JSON or TOML, chosen by the file extension:
+
+        {"version": 1, "operations": [{"op": "blur", "intensity": 5}]}
+
+        version = 1
+        [[operations]]
+        op = "blur"
+        intensity = 5
+    """
+
+    def __init__(self, steps=()):
+        self.steps = [(name, registry.get(name).bind(params)) for name, params in steps]
+
+    def __len__(self):
+        return len(self.steps)
+
+    def apply(self, image, lazy=True):
+        """
+        Run every step on image in order and return the result.
+
+        lazy simplifies the steps as a whole first (see graph.LazyImage);
+        the result is the same as running them one at a time.
+        """
+        if lazy:
+            lazy_image = LazyImage(image)
+            lazy_image.steps = list(self.steps)
+            return lazy_image.compute()
+        for name, params in self.steps:
+            image = registry.get(name).apply(image, params)
+        return image
+
+    def to_dict(self):
+        """Plain data for serialising."""
+        return {
+            "version": RECIPE_VERSION,
+            "operations": [{"op": name, **params} for name, params in self.steps]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a recipe from parsed data; raises ValueError if malformed."""
+        if data.get("version", RECIPE_VERSION) > RECIPE_VERSION:
+            raise ValueError(f"Recipe version {data['version']} is newer than supported")
+        steps = []
+        for entry in data.get("operations", []):
+            params = dict(entry)
+            name = params.pop("op", None)
+            if not name:
+                raise ValueError("Every recipe operation needs an 'op'")
+            steps.append((name, params))
+        return cls(steps)
+
+    @classmethod
+    def load(cls, path):
+        """Read a .json or .toml recipe file."""
+        if os.path.splitext(path)[1].lower() == ".toml":
+            with open(path, "rb") as file:
+                return cls.from_dict(tomllib.load(file))
+        with open(path, encoding="utf-8") as file:
+            return cls.from_dict(json.load(file))
+
+    def save(self, path):
+        """Write the recipe as .json or .toml depending on the extension."""
+        if os.path.splitext(path)[1].lower() == ".toml":
+            text = self.to_toml()
+        else:
+            text = json.dumps(self.to_dict(), indent=2) + "\n"
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+
+    def to_toml(self):
+        """TOML text for the recipe; parameters are plain scalars."""
+        lines = [f"version = {RECIPE_VERSION}"]
+        for entry in self.to_dict()["operations"]:
+            lines += ["", "[[operations]]"]
+            lines += [f"{key} = {json.dumps(value)}" for key, value in entry.items()]
+        return "\n".join(lines) + "\n"
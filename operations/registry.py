@@ -0,0 +1,222 @@
+"""Registry: Named operations with typed parameters, usable without the GUI."""
+
+from config.config import settings
+from operations import adjustments, filters, transforms
+from utils.image_converter import WORKING_MODES, image_mode
+
+
+REQUIRED = object()
+
+
+class Param:
+    """A typed operation parameter with an optional range or set of choices."""
+
+    def __init__(self, name, kind, default=REQUIRED, minimum=None, maximum=None, choices=None):
+        self.name = name
+        self.kind = kind
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = choices
+
+    @property
+    def required(self):
+        """Check if the parameter has no default"""
+        return self.default is REQUIRED
+
+    def convert(self, value):
+        """Convert value to the parameter type, raising ValueError if invalid."""
+        try:
+            if self.kind is int and isinstance(value, str):
+                value = float(value)
+            if self.kind is int and isinstance(value, float):
+                if not value.is_integer():
+                    raise ValueError
+            value = self.kind(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{self.name} must be {self.kind.__name__}, got {value!r}")
+
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f"{self.name} must be one of {', '.join(map(str, self.choices))}")
+        # Limits may be callables so they follow the settings
+        minimum = self.minimum() if callable(self.minimum) else self.minimum
+        maximum = self.maximum() if callable(self.maximum) else self.maximum
+        if minimum is not None and value < minimum:
+            raise ValueError(f"{self.name} must be at least {minimum}")
+        if maximum is not None and value > maximum:
+            raise ValueError(f"{self.name} must be at most {maximum}")
+        return value
+
+
+class OperationSpec:
+    """
+    A registered operation: the image function, its parameters and the
+    working modes (see utils.image_converter) it accepts and produces.
+    """
+
+    def __init__(self, name, func, params=(), inverse=None, modes=WORKING_MODES, produces=None):
+        self.name = name
+        self.func = func
+        self.params = {param.name: param for param in params}
+        self.inverse = inverse  # params -> (name, params) that undo it, or None
+        self.modes = modes
+        self.produces = produces or {}  # input mode -> output mode where they differ
+
+    def output_mode(self, mode):
+        """Working mode of the result for an input of mode; raises ValueError."""
+        if mode not in self.modes:
+            raise ValueError(f"{self.name} does not support {mode} images (only {', '.join(self.modes)})")
+        return self.produces.get(mode, mode)
+
+    def bind(self, values):
+        """Check and convert values, filling in defaults; raises ValueError."""
+        unknown = set(values) - set(self.params)
+        if unknown:
+            raise ValueError(f"{self.name} has no parameter {', '.join(sorted(unknown))}")
+
+        bound = {}
+        for name, param in self.params.items():
+            if name in values:
+                bound[name] = param.convert(values[name])
+            elif param.required:
+                raise ValueError(f"{self.name} needs {name}")
+            else:
+                bound[name] = param.default
+        return bound
+
+    def apply(self, image, params):
+        """Run the operation on image with already bound params."""
+        self.output_mode(image_mode(image))
+        return self.func(image, **params)
+
+
+OPERATIONS = {}
+
+
+def register(name, func, *params, inverse=None, modes=WORKING_MODES, produces=None):
+    """Add an operation to the registry and return its spec."""
+    spec = OperationSpec(name, func, params, inverse, modes, produces)
+    OPERATIONS[name] = spec
+    return spec
+
+
+def get(name):
+    """Look up an operation by name; raises ValueError if unknown."""
+    try:
+        return OPERATIONS[name]
+    except KeyError:
+        raise ValueError(f"Unknown operation '{name}' (choose from {', '.join(OPERATIONS)})")
+
+
+def apply(image, name, **params):
+    """Check params and run the named operation on image."""
+    spec = get(name)
+    return spec.apply(image, spec.bind(params))
+
+
+def rotation_inverse(params):
+    """Quarter turns are undone by turning the rest of the way round."""
+    if params["angle"] % 90 != 0:
+        return None
+    return "rotate", {"angle": (360 - params["angle"]) % 360}
+
+
+def orientation_inverse(params):
+    """Every orientation is its own inverse except the two quarter turns."""
+    swap = {"rotate_90": "rotate_270", "rotate_270": "rotate_90"}
+    orientation = params["orientation"]
+    return "orient", {"orientation": swap.get(orientation, orientation)}
+
+
+def slider(name, section, low, high, default=0):
+    """Integer slider parameter limited by a settings section."""
+    return Param(
+        name, int, default,
+        minimum=lambda: settings[section][low],
+        maximum=lambda: settings[section][high]
+    )
+
+
+# Grey results keep any alpha channel
+TO_GRAY = {"RGB": "L", "RGBA": "LA"}
+
+
+register("grayscale", filters.apply_grayscale, produces=TO_GRAY)
+register(
+    "blur", filters.apply_blur,
+    Param(
+        "intensity", int,
+        minimum=lambda: settings.image_processing.min_blur_intensity,
+        maximum=lambda: settings.image_processing.max_blur_intensity
+    )
+)
+register(
+    "edges", filters.apply_edge_detection,
+    slider("low", "edges", "min_threshold", "max_threshold", 50),
+    slider("high", "edges", "min_threshold", "max_threshold", 150),
+    Param("aperture", int, 3, choices=(3, 5, 7)),
+    produces=TO_GRAY
+)
+register(
+    "brightness", adjustments.adjust_brightness,
+    slider("value", "brightness_contrast", "min_brightness", "max_brightness", REQUIRED)
+)
+register(
+    "contrast", adjustments.adjust_contrast,
+    slider("value", "brightness_contrast", "min_contrast", "max_contrast", REQUIRED)
+)
+register(
+    "saturation", adjustments.adjust_saturation,
+    slider("value", "saturation", "min", "max", REQUIRED)
+)
+register(
+    "adjust", adjustments.apply_adjustments,
+    slider("brightness", "brightness_contrast", "min_brightness", "max_brightness"),
+    slider("contrast", "brightness_contrast", "min_contrast", "max_contrast"),
+    slider("saturation", "saturation", "min", "max")
+)
+register(
+    "levels", adjustments.apply_levels,
+    *(Param(f"black_{channel}", int, 0, minimum=0, maximum=254) for channel in ("red", "green", "blue")),
+    *(Param(f"white_{channel}", int, 255, minimum=1, maximum=255) for channel in ("red", "green", "blue"))
+)
+register(
+    "auto_levels", adjustments.apply_auto_levels,
+    Param("clip", float, 0.5, minimum=0.0, maximum=49.0)
+)
+register(
+    "auto_contrast", adjustments.apply_auto_contrast,
+    Param("clip", float, 0.5, minimum=0.0, maximum=49.0)
+)
+register(
+    "clahe", adjustments.apply_clahe,
+    Param("clip_limit", float, 2.0, minimum=0.1, maximum=40.0),
+    Param("grid", int, 8, minimum=1, maximum=64)
+)
+register(
+    "rotate", transforms.rotate_image,
+    Param("angle", float),
+    inverse=rotation_inverse
+)
+register(
+    "flip", transforms.flip_image,
+    Param("direction", str, choices=("horizontal", "vertical")),
+    inverse=lambda params: ("flip", params)
+)
+register(
+    "orient", transforms.orient_image,
+    Param("orientation", str, choices=tuple(transforms.ORIENTATIONS)),
+    inverse=orientation_inverse
+)
+register(
+    "resize", transforms.resize_image,
+    Param("width", int, minimum=1, maximum=lambda: settings.performance.max_dimension),
+    Param("height", int, minimum=1, maximum=lambda: settings.performance.max_dimension)
+)
+register(
+    "crop", transforms.crop_image,
+    Param("left", int, minimum=0),
+    Param("top", int, minimum=0),
+    Param("right", int, minimum=1),
+    Param("bottom", int, minimum=1)
+)
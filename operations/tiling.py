@@ -0,0 +1,165 @@
+"""Tiling: Run operations over overlapping tiles on a thread or process pool."""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from config.config import settings
+from utils.out_of_core import is_mapped, scratch_array
+
+
+_executor = None
+_process_executor = None
+
+
+def worker_count():
+    """
+    Number of workers, one per CPU core unless configured.
+
+    A worker process of a pool (the batch pool or the tiling process
+    backend) uses one, since the pool already provides the parallelism.
+    """
+    if multiprocessing.parent_process() is not None:
+        return 1
+    return settings.performance.worker_threads or os.cpu_count() or 1
+
+
+def get_executor():
+    """Shared thread pool; OpenCV releases the GIL while it computes."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=worker_count(), thread_name_prefix="tile")
+    return _executor
+
+
+def get_process_executor():
+    """Shared process pool for operations that hold the GIL."""
+    global _process_executor
+    if _process_executor is None:
+        # spawn: forking a process that runs Tk and worker threads is unsafe
+        _process_executor = ProcessPoolExecutor(
+            max_workers=worker_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_executor
+
+
+def iter_tiles(height, width, tile_size):
+    """Yield (top, bottom, left, right) boxes covering the image."""
+    for top in range(0, height, tile_size):
+        for left in range(0, width, tile_size):
+            yield top, min(top + tile_size, height), left, min(left + tile_size, width)
+
+
+def run_tile(image, out, box, halo, func):
+    """Process one tile of image with its halo and write its centre to out."""
+    height, width = image.shape[:2]
+    top, bottom, left, right = box
+    # Read the tile with its halo, clipped to the image
+    pad_top, pad_left = min(halo, top), min(halo, left)
+    tile = image[
+        top - pad_top:min(bottom + halo, height),
+        left - pad_left:min(right + halo, width)
+    ]
+    result = func(tile)
+    out[top:bottom, left:right] = result[
+        pad_top:pad_top + bottom - top,
+        pad_left:pad_left + right - left
+    ]
+
+
+def process_tiled(image, func, halo=0, out=None, backend=None):
+    """
+    Run func over image in overlapping tiles and stitch the results.
+
+    func(tile) must return an array with the tile's height and width. halo
+    is how far, in pixels, an output pixel can see into its neighbourhood
+    (a kernel's radius, 0 for per-pixel operations). Each tile is read with
+    that many real pixels around it and the margin is cut off before
+    stitching, so tile borders leave no seams. Images below
+    performance.tile_min_pixels are processed in a single call.
+
+    A memory-mapped image is always processed tile by tile into a mapped
+    output, so only the tiles in flight are held in RAM.
+
+    backend is "threads" or "processes", performance.backend by default.
+    The process backend needs a picklable func (a module level function or
+    a functools.partial of one).
+    """
+    height, width = image.shape[:2]
+    # A multiple of 64 keeps OpenCV's vectorised row tails where an untiled
+    # call has them, so per-pixel colour conversions round the same way
+    tile_size = max(64, settings.performance.tile_size // 64 * 64)
+    # Keep the re-read halo small next to the tile for wide kernels
+    tile_size = max(tile_size, -(-4 * halo // 64) * 64)
+    mapped = is_mapped(image)
+    small = height * width < settings.performance.tile_min_pixels or worker_count() == 1
+    if small and not mapped:
+        if out is None:
+            return func(image)
+        out[...] = func(image)
+        return out
+
+    tiles = list(iter_tiles(height, width, tile_size))
+    if out is None:
+        # A small corner tells us the output channels and dtype
+        probe = func(image[:16, :16])
+        shape = (height, width) + probe.shape[2:]
+        out = scratch_array(shape, probe.dtype) if mapped else np.empty(shape, dtype=probe.dtype)
+
+    # Shared memory would need the whole frame in RAM
+    if (backend or settings.performance.backend) == "processes" and not mapped:
+        return process_tiled_shared(image, func, halo, out, tiles)
+
+    # Consume the iterator so worker exceptions are raised here
+    list(get_executor().map(lambda box: run_tile(image, out, box, halo, func), tiles))
+    return out
+
+
+def process_tiled_shared(image, func, halo, out, tiles):
+    """
+    Process tiles in worker processes through shared memory.
+
+    The frame is copied once into a shared block and workers write their
+    tiles straight into a shared output block, so no pixel data is
+    pickled; only the block names, the tile box and func are sent.
+    """
+    src = SharedMemory(create=True, size=max(1, image.nbytes))
+    dst = SharedMemory(create=True, size=max(1, out.nbytes))
+    try:
+        src_array = np.ndarray(image.shape, dtype=image.dtype, buffer=src.buf)
+        src_array[...] = image
+        del src_array
+        src_spec = (src.name, image.shape, image.dtype.str)
+        dst_spec = (dst.name, out.shape, out.dtype.str)
+
+        tasks = [(src_spec, dst_spec, box, halo, func) for box in tiles]
+        list(get_process_executor().map(run_shared_tile, tasks))
+
+        out[...] = np.ndarray(out.shape, dtype=out.dtype, buffer=dst.buf)
+        return out
+    finally:
+        src.close()
+        src.unlink()
+        dst.close()
+        dst.unlink()
+
+
+def run_shared_tile(task):
+    """Worker side of process_tiled_shared: process one tile in place."""
+    src_spec, dst_spec, box, halo, func = task
+    # Spawned workers share the parent's resource tracker, and the parent
+    # unlinks the blocks once every tile is done
+    src = SharedMemory(name=src_spec[0])
+    dst = SharedMemory(name=dst_spec[0])
+    image = out = None
+    try:
+        image = np.ndarray(src_spec[1], dtype=src_spec[2], buffer=src.buf)
+        out = np.ndarray(dst_spec[1], dtype=dst_spec[2], buffer=dst.buf)
+        run_tile(image, out, box, halo, func)
+    finally:
+        # Views must be gone before the blocks can be closed
+        del image, out
+        src.close()
+        dst.close()
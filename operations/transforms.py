@@ -1,26 +1,119 @@
 
-from PIL import Image
+import cv2
+import numpy as np
+from utils.out_of_core import is_mapped, output_for, scratch_array
+
+
+ROTATE_CODES = {
+    90: cv2.ROTATE_90_CLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_COUNTERCLOCKWISE,
+}
+
+# The eight orientations of a rectangle as (transpose, flip horizontally,
+# flip vertically), applied in that order
+ORIENTATIONS = {
+    "identity": (False, False, False),
+    "flip_horizontal": (False, True, False),
+    "flip_vertical": (False, False, True),
+    "rotate_180": (False, True, True),
+    "transpose": (True, False, False),
+    "rotate_90": (True, True, False),
+    "rotate_270": (True, False, True),
+    "transverse": (True, True, True),
+}
+
+FLIP_CODES = {(True, False): 1, (False, True): 0, (True, True): -1}
 
 
 def rotate_image(image, angle):
     """
-    Rotate image by angle.
+    Rotate image clockwise by angle.
     """
-    return image.rotate(-float(angle), expand=True)
+    angle = float(angle) % 360
+    if angle == 0:
+        return image
+    if angle in ROTATE_CODES:
+        height, width = image.shape[:2]
+        shape = ((height, width) if angle == 180 else (width, height)) + image.shape[2:]
+        return cv2.rotate(image, ROTATE_CODES[int(angle)], dst=output_for(image, shape))
+
+    height, width = image.shape[:2]
+    matrix, (new_width, new_height) = rotation_matrix(width, height, angle)
+    return cv2.warpAffine(
+        image, matrix, (new_width, new_height),
+        dst=output_for(image, (new_height, new_width) + image.shape[2:]),
+        flags=cv2.INTER_NEAREST
+    )
     
 
+def rotation_matrix(width, height, angle):
+    """
+    Affine matrix and (width, height) of the canvas for a clockwise rotation.
+    """
+    # Arbitrary angles: expand the canvas so nothing is cut off
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), -angle, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    new_width = int(np.ceil(height * sin + width * cos))
+    new_height = int(np.ceil(height * cos + width * sin))
+    matrix[0, 2] += (new_width - width) / 2
+    matrix[1, 2] += (new_height - height) / 2
+    return matrix, (new_width, new_height)
+
+
+def orient_image(image, orientation):
+    """
+    Transpose and/or flip image into one of ORIENTATIONS.
+
+    Covers every combination of quarter turns and flips in at most one
+    transpose and one flip.
+    """
+    transpose, flip_x, flip_y = ORIENTATIONS[orientation]
+    if transpose:
+        height, width = image.shape[:2]
+        image = cv2.transpose(image, dst=output_for(image, (width, height) + image.shape[2:]))
+        if flip_x or flip_y:
+            # In place, the transposed copy is ours
+            return cv2.flip(image, FLIP_CODES[flip_x, flip_y], dst=image)
+        return image
+    if flip_x or flip_y:
+        return cv2.flip(image, FLIP_CODES[flip_x, flip_y], dst=output_for(image, image.shape))
+    return image
+
+
 def flip_image(image, direction):
     """
     Flip image horizontally or vertically
     """
     if direction == "horizontal":
-        return image.transpose(Image.Flip_Left_Right)
+        return cv2.flip(image, 1, dst=output_for(image, image.shape))
     
     elif direction == "vertical":
-        return image.transpose(Image.Flip_Top_Bottom)
+        return cv2.flip(image, 0, dst=output_for(image, image.shape))
     
     return image
 
 
 def resize_image(image, width, height):
-    return image.resize((int(width), int(height)), Image.Resampling.LANCZOS)
+    """
+    Resize image, area-averaging when shrinking and Lanczos when enlarging.
+    """
+    size = (int(width), int(height))
+    shrinking = size[0] * size[1] < image.shape[1] * image.shape[0]
+    interpolation = cv2.INTER_AREA if shrinking else cv2.INTER_LANCZOS4
+    dst = output_for(image, (size[1], size[0]) + image.shape[2:])
+    return cv2.resize(image, size, dst=dst, interpolation=interpolation)
+
+
+def crop_image(image, left, top, right, bottom):
+    """
+    Crop image to the box (left, top, right, bottom).
+    """
+    region = image[int(top):int(bottom), int(left):int(right)]
+    if region.size == 0:
+        raise ValueError("Crop box does not overlap the image")
+    if is_mapped(image):
+        cropped = scratch_array(region.shape)
+        cropped[...] = region
+        return cropped
+    return np.ascontiguousarray(region)
@@ -1,6 +1,12 @@
+import math
 import tkinter as tk
-from PIL import Image, ImageTk
+from collections import OrderedDict
+import cv2
+from PIL import ImageTk
 from config.config import settings
+from ui.display_pyramid import DisplayPyramid
+from utils.image_converter import array_to_pil, image_size
+from utils.tracing import span
 
 
 class CanvasDisplay:
@@ -11,6 +17,15 @@ class CanvasDisplay:
         self.parent = parent
         self.canvas = None
         self.photo_image = None
+        self.photo_mode = None  # PIL mode photo_image was created for; paste() keeps it
+        self.image_item = None
+        self.pyramid = None  # DisplayPyramid of the last image displayed
+        self.zoom = None  # None = fit to window
+        self.origin = (0, 0)  # zoomed image pixel at the canvas top left
+        self.tiles = OrderedDict()  # (zoom, column, row) -> PhotoImage, least recent first
+        self.visible_tiles = []  # PhotoImages on the canvas, kept alive while drawn
+        self.render_job = None
+        self.drag_start = None
         self.create_canvas()
     
     def create_canvas(self):
@@ -30,18 +45,77 @@ class CanvasDisplay:
         )
         self.canvas.pack(fill=tk.BOTH, expand=True)
         self.canvas.bind('<Configure>', lambda e: self.on_resize())
+        
+        # Wheel zooms around the pointer, dragging pans
+        self.canvas.bind('<MouseWheel>', lambda e: self.zoom_by(e.delta > 0, e.x, e.y))
+        self.canvas.bind('<Button-4>', lambda e: self.zoom_by(True, e.x, e.y))
+        self.canvas.bind('<Button-5>', lambda e: self.zoom_by(False, e.x, e.y))
+        self.canvas.bind('<ButtonPress-1>', self.start_pan)
+        self.canvas.bind('<B1-Motion>', self.pan)
         self.show_placeholder()
     
     def on_resize(self):
         """Handle canvas resize."""
-        if not self.photo_image:
+        if self.pyramid is None:
             self.show_placeholder()
+        else:
+            # A drag-resize sends a stream of events; redraw once it settles
+            self.request_render(settings.display.resize_delay_ms)
+    
+    def request_render(self, delay=0):
+        """Redraw after delay ms, replacing any redraw already waiting."""
+        if self.render_job is not None:
+            self.canvas.after_cancel(self.render_job)
+        self.render_job = self.canvas.after(delay, self.render)
+    
+    def get_view_size(self):
+        """Get the (width, height) available for the image on the canvas."""
+        self.canvas.update_idletasks()
+        width = self.canvas.winfo_width() - settings.layout.canvas_padding
+        height = self.canvas.winfo_height() - settings.layout.canvas_padding
+        return max(1, width), max(1, height)
     
     def display_image(self, image):
-        """Display image on canvas with proper scaling."""
-        if not image:
+        """Display image array on canvas with proper scaling."""
+        if image is None:
+            return
+        
+        # Levels and tiles are kept until a different image is displayed
+        if self.pyramid is None or self.pyramid.image is not image:
+            self.pyramid = DisplayPyramid(image)
+            self.tiles.clear()
+        with span("display", "display"):
+            self.render()
+    
+    def display_preview(self, image):
+        """Display a preview frame without replacing the cached pyramid."""
+        if image is None:
             return
         
+        if self.zoom is not None and self.pyramid is not None:
+            # Previews are scaled down copies, so zoom them by the difference
+            zoom = self.zoom * image_size(image)[0] / image_size(self.pyramid.image)[0]
+            self.show_tiles(DisplayPyramid(image), zoom, cache=False)
+            return
+        
+        # Previews are rendered at about display size already
+        self.show_scaled(
+            image,
+            lambda width, height: cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        )
+    
+    def render(self):
+        """Draw the current image at the current zoom."""
+        self.render_job = None
+        if self.pyramid is None:
+            return
+        if self.zoom is None:
+            self.show_scaled(self.pyramid.image, self.pyramid.scaled)
+        else:
+            self.show_tiles(self.pyramid, self.zoom)
+    
+    def show_scaled(self, image, scale_to):
+        """Fit image to the canvas, scaling it down with scale_to(width, height)."""
         # Update canvas dimensions
         self.canvas.update_idletasks()
         canvas_width = self.canvas.winfo_width()
@@ -51,40 +125,170 @@ class CanvasDisplay:
         if canvas_width <= 1 or canvas_height <= 1:
             return
         
-        # Create a copy and scale it to fit canvas
-        display_image = image.copy()
+        # Scale into a new array; the source is shared and must not change
+        width, height = image_size(image)
         max_width = canvas_width - settings.layout.canvas_padding
         max_height = canvas_height - settings.layout.canvas_padding
-        display_image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+        scale = min(max_width / width, max_height / height, 1.0)
+        if scale < 1.0:
+            width, height = max(1, round(width * scale)), max(1, round(height * scale))
+            with span("display scaling", "display"):
+                image = scale_to(width, height)
         
-        # Convert to PhotoImage
-        self.photo_image = ImageTk.PhotoImage(display_image)
+        # PIL is only used at the Tk boundary
+        pil_image = array_to_pil(image)
+        if (
+            self.image_item is not None and self.photo_mode == pil_image.mode
+            and self.photo_image.width() == width and self.photo_image.height() == height
+        ):
+            # Same size and mode: update the existing PhotoImage in place
+            with span("PhotoImage paste", "display"):
+                self.photo_image.paste(pil_image)
+        else:
+            # A PhotoImage keeps the mode it was created with, so a grey one
+            # would show a colour frame in grey
+            with span("PhotoImage", "display"):
+                self.photo_image = ImageTk.PhotoImage(pil_image)
+            self.photo_mode = pil_image.mode
+            self.canvas.delete("all")
+            self.visible_tiles = []
+            self.image_item = self.canvas.create_image(0, 0, image=self.photo_image, anchor="nw")
+        
+        # Center the image
+        x = (canvas_width - width) // 2
+        y = (canvas_height - height) // 2
+        self.canvas.coords(self.image_item, x, y)
+    
+    def show_tiles(self, pyramid, zoom, cache=True):
+        """Draw the tiles of the zoomed image that fall inside the canvas."""
+        canvas_width = self.canvas.winfo_width()
+        canvas_height = self.canvas.winfo_height()
+        if canvas_width <= 1 or canvas_height <= 1:
+            return
+        
+        width, height = image_size(pyramid.image)
+        zoomed_width = max(1, math.ceil(width * zoom))
+        zoomed_height = max(1, math.ceil(height * zoom))
+        left = self.clamp_origin(self.origin[0], zoomed_width, canvas_width)
+        top = self.clamp_origin(self.origin[1], zoomed_height, canvas_height)
+        self.origin = (left, top)
+        
+        tile_size = settings.display.tile_size
+        columns = range(max(0, left // tile_size), min(zoomed_width - 1, left + canvas_width - 1) // tile_size + 1)
+        rows = range(max(0, top // tile_size), min(zoomed_height - 1, top + canvas_height - 1) // tile_size + 1)
+        
+        photos = []
+        for row in rows:
+            for column in columns:
+                x, y = column * tile_size, row * tile_size
+                size = (min(tile_size, zoomed_width - x), min(tile_size, zoomed_height - y))
+                key = (zoom, column, row)
+                if cache and key in self.tiles:
+                    self.tiles.move_to_end(key)
+                    photo = self.tiles[key]
+                else:
+                    with span("display scaling", "display"):
+                        tile = pyramid.render(zoom, x, y, *size)
+                    with span("PhotoImage", "display"):
+                        photo = ImageTk.PhotoImage(array_to_pil(tile))
+                    if cache:
+                        self.tiles[key] = photo
+                        while len(self.tiles) > settings.display.tile_cache_size:
+                            self.tiles.popitem(last=False)
+                photos.append((photo, x - left, y - top))
         
-        # Clear canvas and draw image
         self.canvas.delete("all")
+        self.image_item = None
+        for photo, x, y in photos:
+            self.canvas.create_image(x, y, image=photo, anchor="nw")
+        self.visible_tiles = [photo for photo, _, _ in photos]
+    
+    @staticmethod
+    def clamp_origin(start, zoomed, view):
+        """Keep the view on the image, centring an image smaller than the view."""
+        if zoomed <= view:
+            return -((view - zoomed) // 2)
+        return min(max(start, 0), zoomed - view)
+    
+    def fit_zoom(self):
+        """Zoom at which the whole image fits the canvas."""
+        width, height = image_size(self.pyramid.image)
+        view_width, view_height = self.get_view_size()
+        return min(view_width / width, view_height / height, 1.0)
+    
+    def set_zoom(self, zoom, anchor_x=None, anchor_y=None):
+        """Zoom to zoom (None = fit), keeping the image point under the anchor still."""
+        if self.pyramid is None:
+            return
+        if zoom is not None:
+            zoom = min(max(zoom, min(self.fit_zoom(), 1.0)), settings.display.max_zoom)
         
-        # Center the image
-        x = (canvas_width - display_image.width) // 2
-        y = (canvas_height - display_image.height) // 2
+        old_zoom = self.zoom if self.zoom is not None else self.fit_zoom()
+        if anchor_x is None:
+            anchor_x, anchor_y = self.canvas.winfo_width() // 2, self.canvas.winfo_height() // 2
+        if self.zoom is None:
+            # Fitted images are centred on the canvas
+            width, height = image_size(self.pyramid.image)
+            self.origin = (
+                self.clamp_origin(0, round(width * old_zoom), self.canvas.winfo_width()),
+                self.clamp_origin(0, round(height * old_zoom), self.canvas.winfo_height())
+            )
         
-        self.canvas.create_image(x, y, image=self.photo_image, anchor="nw")
+        if zoom is not None:
+            ratio = zoom / old_zoom
+            self.origin = (
+                round((self.origin[0] + anchor_x) * ratio - anchor_x),
+                round((self.origin[1] + anchor_y) * ratio - anchor_y)
+            )
+        self.zoom = zoom
+        self.render()
+    
+    def zoom_by(self, zoom_in, anchor_x=None, anchor_y=None):
+        """Step the zoom in or out by settings.display.zoom_step."""
+        if self.pyramid is None:
+            return
+        zoom = self.zoom if self.zoom is not None else self.fit_zoom()
+        step = settings.display.zoom_step
+        self.set_zoom(zoom * step if zoom_in else zoom / step, anchor_x, anchor_y)
+    
+    def start_pan(self, event):
+        """Remember where a drag started."""
+        self.drag_start = (event.x, event.y)
+    
+    def pan(self, event):
+        """Move the zoomed view with the pointer."""
+        if self.zoom is None or self.drag_start is None:
+            return
+        dx, dy = event.x - self.drag_start[0], event.y - self.drag_start[1]
+        self.drag_start = (event.x, event.y)
+        self.origin = (self.origin[0] - dx, self.origin[1] - dy)
+        
+        # Move what is drawn now, fill in new tiles once the events settle
+        self.canvas.move("all", dx, dy)
+        self.request_render()
     
     def clear(self):
         """Clear the canvas."""
         self.canvas.delete("all")
         self.photo_image = None
+        self.photo_mode = None
+        self.pyramid = None
+        self.tiles.clear()
+        self.visible_tiles = []
+        self.zoom = None
         self.show_placeholder()
-
+    
     def show_placeholder(self):
         """Display placeholder text when no image is loaded."""
         self.canvas.delete("all")
+        self.image_item = None
         width = self.canvas.winfo_width()
         height = self.canvas.winfo_height()
         
         # Default dimensions if canvas not yet rendered
         if width <= 1: width = 600
         if height <= 1: height = 400
-            
+        
         self.canvas.create_text(
             width // 2,
             height // 2,
@@ -95,4 +299,4 @@ class CanvasDisplay:
     
     def get_canvas(self):
         """Get the canvas widget."""
-        return self.canvas
\ No newline at end of file
+        return self.canvas
@@ -1,12 +1,14 @@
 import tkinter as tk
 from tkinter import ttk
 from config.config import settings
+from ui.histogram_panel import HistogramPanel
 
 class ControlPanel:
     def __init__(self, parent, callbacks):
         """Initialize control panel."""
         self.parent = parent
         self.callbacks = callbacks
+        self.quiet_values = {}  # slider -> value it was set to without user input
         self.create_panel()
     
     def create_panel(self):
@@ -14,6 +16,8 @@ class ControlPanel:
         panel = tk.Frame(self.parent)
         panel.grid(row=0, column=1, sticky="nsew")
         
+        self.histogram = HistogramPanel(panel)
+        
         self.notebook = ttk.Notebook(panel)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
@@ -51,7 +55,7 @@ class ControlPanel:
             to=settings.brightness_contrast.max_brightness,
             orient=tk.HORIZONTAL,
             showvalue=0,
-            command=self.callbacks.get('slider_change')
+            command=lambda value: self.on_slider_change(self.brightness_slider, value)
         )
         self.brightness_slider.pack(fill=tk.X, padx=10)
         
@@ -67,7 +71,7 @@ class ControlPanel:
             to=settings.brightness_contrast.max_contrast,
             orient=tk.HORIZONTAL,
             showvalue=0,
-            command=self.callbacks.get('slider_change')
+            command=lambda value: self.on_slider_change(self.contrast_slider, value)
         )
         self.contrast_slider.pack(fill=tk.X, padx=10)
 
@@ -83,7 +87,7 @@ class ControlPanel:
             to=settings.saturation.max,
             orient=tk.HORIZONTAL,
             showvalue=0,
-            command=self.callbacks.get('slider_change')
+            command=lambda value: self.on_slider_change(self.sat_slider, value)
         )
         self.sat_slider.pack(fill=tk.X, padx=10)
         
@@ -97,6 +101,20 @@ class ControlPanel:
             font=("Arial", 9, "bold")
         ).pack(pady=20, fill=tk.X, padx=10)
 
+        # One-click enhancements
+        tk.Label(tab, text="Auto enhance", font=("Arial", 10, "bold")).pack(pady=(0, 5))
+
+        auto_frame = tk.Frame(tab)
+        auto_frame.pack()
+
+        for label in ("Auto Levels", "Auto Contrast", "CLAHE"):
+            tk.Button(
+                auto_frame,
+                text=label,
+                command=lambda l=label: self.callbacks.get('button_click')(l),
+                width=11
+            ).pack(side=tk.LEFT, padx=2)
+
         self.add_reset_button(tab)
     
     def create_filters_tab(self):
@@ -122,9 +140,9 @@ class ControlPanel:
             to=settings.image_processing.max_blur_intensity,
             orient=tk.HORIZONTAL,
             showvalue=0,
-            command=lambda v: self.blur_value.config(text=str(int(float(v))))
+            command=self.on_blur_change
         )
-        self.blur_slider.set(settings.image_processing.default_blur_intensity)
+        self.set_quietly(self.blur_slider, settings.image_processing.default_blur_intensity)
         self.blur_slider.pack(fill=tk.X, padx=10)
 
         tk.Button(
@@ -134,13 +152,26 @@ class ControlPanel:
             width=20
         ).pack(pady=5, padx=10)
         
-        # Edge detection button
+        # Edge detection section with Canny thresholds and aperture
+        tk.Label(tab, text="Edge thresholds", font=("Arial", 10, "bold")).pack(pady=(10, 2))
+        self.edge_low_slider = self.add_edge_slider(tab, "Low", settings.edges.default_low)
+        self.edge_high_slider = self.add_edge_slider(tab, "High", settings.edges.default_high)
+        self.edge_aperture_slider = self.add_edge_slider(tab, "Aperture", settings.edges.default_aperture, 3, 7, 2)
+
         tk.Button(
             tab,
             text="Edge Detect",
             command=lambda: self.callbacks.get('button_click')("Edge Detect"),
             width=20
-        ).pack(pady=10, padx=10)
+        ).pack(pady=(10, 2), padx=10)
+
+        self.edge_preview = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            tab,
+            text="Preview edges",
+            variable=self.edge_preview,
+            command=self.callbacks.get('edge_preview')
+        ).pack()
 
         self.add_reset_button(tab)
     
@@ -228,6 +259,55 @@ class ControlPanel:
 
         self.add_reset_button(tab)
 
+    def on_slider_change(self, slider, value):
+        """Preview adjustments when the user moves an adjustment slider."""
+        if self.was_set_quietly(slider, value):
+            return
+        self.callbacks.get('slider_change')(value)
+
+    def on_blur_change(self, value):
+        """Update the blur label and notify the app for a live preview."""
+        self.blur_value.config(text=str(int(float(value))))
+        self.on_slider_change(self.blur_slider, value)
+
+    def add_edge_slider(self, parent, label, default, low=None, high=None, resolution=1):
+        """Add a labelled edge detection slider that previews edges as it moves."""
+        row = tk.Frame(parent)
+        row.pack(fill=tk.X, padx=10)
+        tk.Label(row, text=label, width=8, anchor=tk.W, font=("Arial", 9)).pack(side=tk.LEFT)
+        slider = tk.Scale(
+            row,
+            from_=settings.edges.min_threshold if low is None else low,
+            to=settings.edges.max_threshold if high is None else high,
+            resolution=resolution,
+            orient=tk.HORIZONTAL
+        )
+        slider.config(command=lambda value: self.on_edge_change(slider, value))
+        self.set_quietly(slider, default)
+        slider.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        return slider
+
+    def on_edge_change(self, slider, value):
+        """Preview edges when the user moves an edge slider."""
+        if self.was_set_quietly(slider, value):
+            return
+        self.callbacks.get('edge_change')()
+
+    def set_quietly(self, slider, value):
+        """
+        Set a slider without starting a preview.
+
+        Tk runs a Scale's command later, when idle, for any change of
+        value, so the value is remembered and that call ignored.
+        """
+        if slider.get() != value:
+            self.quiet_values[slider] = float(value)
+            slider.set(value)
+
+    def was_set_quietly(self, slider, value):
+        """Check if a slider's command is reporting a set_quietly() call"""
+        return self.quiet_values.pop(slider, None) == float(value)
+
     def add_reset_button(self, parent):
         """Add reset-to-original button to a tab."""
         tk.Button(
@@ -252,13 +332,18 @@ class ControlPanel:
     
     def reset_sliders(self):
         """Reset all sliders to default values."""
-        self.brightness_slider.set(0)
-        self.contrast_slider.set(0)
+        self.set_quietly(self.brightness_slider, 0)
+        self.set_quietly(self.contrast_slider, 0)
         self.brightness_value.config(text="0")
         self.contrast_value.config(text="0")
         if hasattr(self, "sat_slider"):
-            self.sat_slider.set(0)
+            self.set_quietly(self.sat_slider, 0)
             self.sat_value.config(text="0")
         if hasattr(self, "blur_slider"):
-            self.blur_slider.set(settings.image_processing.default_blur_intensity)
+            self.set_quietly(self.blur_slider, settings.image_processing.default_blur_intensity)
             self.blur_value.config(text=str(settings.image_processing.default_blur_intensity))
+        if hasattr(self, "edge_preview"):
+            self.edge_preview.set(False)
+            self.set_quietly(self.edge_low_slider, settings.edges.default_low)
+            self.set_quietly(self.edge_high_slider, settings.edges.default_high)
+            self.set_quietly(self.edge_aperture_slider, settings.edges.default_aperture)
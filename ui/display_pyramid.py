@@ -0,0 +1,83 @@
+import math
+import cv2
+import numpy as np
+from utils.image_converter import image_size
+from utils.out_of_core import is_mapped
+
+
+class DisplayPyramid:
+    """
+    Mip levels of one image for display, each half the size of the last.
+
+    Levels are built on demand from the nearest bigger level that exists
+    and kept, so scaling for display reads at most a level twice the size
+    of the target and redraws cost the same whatever the source resolution.
+    Nothing here touches Tk.
+    """
+
+    def __init__(self, image):
+        self.image = image
+        self.levels = {0: image}
+
+    def level(self, index):
+        """The image halved index times."""
+        if index not in self.levels:
+            below = max(i for i in self.levels if i < index)
+            source = self.levels[below]
+            factor = 2 ** (index - below)
+            if is_mapped(source) and factor > 2:
+                # Skip rows and columns of a scratch file rather than read
+                # them all, leaving area averaging two pixels per output pixel
+                step = factor // 2
+                source = source[::step, ::step]
+            width, height = image_size(self.image)
+            size = (max(1, width >> index), max(1, height >> index))
+            self.levels[index] = cv2.resize(source, size, interpolation=cv2.INTER_AREA)
+        return self.levels[index]
+
+    def covering(self, width, height):
+        """The smallest level at least width x height, or the image itself."""
+        full_width, full_height = image_size(self.image)
+        index = 0
+        while full_width >> (index + 1) >= width and full_height >> (index + 1) >= height:
+            index += 1
+        return self.level(index)
+
+    def scaled(self, width, height):
+        """The image scaled to width x height from the smallest level that is big enough."""
+        level = self.covering(width, height)
+        if image_size(level) == (width, height):
+            return level
+        return cv2.resize(level, (width, height), interpolation=cv2.INTER_AREA)
+
+    def render(self, zoom, left, top, width, height):
+        """
+        The width x height block at (left, top) of the image scaled by zoom.
+
+        Only that block is computed, from the smallest level at least as big
+        as the zoomed image. Past 100% pixels are repeated so they stay sharp.
+        """
+        index = 0
+        while zoom * 2 ** (index + 1) <= 1:
+            index += 1
+        level = self.level(index)
+        scale = zoom * 2 ** index
+
+        # Level coordinates of the block, padded for interpolation
+        start_x = (left + 0.5) / scale - 0.5
+        start_y = (top + 0.5) / scale - 0.5
+        level_width, level_height = image_size(level)
+        x0 = min(max(0, math.floor(start_x) - 1), level_width - 1)
+        y0 = min(max(0, math.floor(start_y) - 1), level_height - 1)
+        x1 = min(level_width, math.ceil(start_x + width / scale) + 2)
+        y1 = min(level_height, math.ceil(start_y + height / scale) + 2)
+        source = level[y0:max(y1, y0 + 1), x0:max(x1, x0 + 1)]
+
+        # Maps block pixels to source pixels
+        matrix = np.float32([[1 / scale, 0, start_x - x0], [0, 1 / scale, start_y - y0]])
+        interpolation = cv2.INTER_NEAREST if scale >= 1 else cv2.INTER_LINEAR
+        return cv2.warpAffine(
+            source, matrix, (width, height),
+            flags=interpolation | cv2.WARP_INVERSE_MAP,
+            borderMode=cv2.BORDER_REPLICATE
+        )
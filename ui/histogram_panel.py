@@ -0,0 +1,58 @@
+import tkinter as tk
+import numpy as np
+from config.config import settings
+
+
+# Drawn in this order, luminance underneath
+CURVES = ((3, "#9e9e9e"), (0, "#e53935"), (1, "#43a047"), (2, "#1e88e5"))
+
+
+class HistogramPanel:
+    """Draws red, green, blue and luminance histograms as curves."""
+    
+    def __init__(self, parent):
+        """Initialize histogram panel."""
+        self.parent = parent
+        self.histogram = None
+        self.create_canvas()
+    
+    def create_canvas(self):
+        """Create the canvas widget."""
+        self.canvas = tk.Canvas(
+            self.parent,
+            height=settings.histogram.height,
+            bg=settings.colors.canvas_background,
+            highlightthickness=1,
+            highlightbackground="#d0d0d0"
+        )
+        self.canvas.pack(fill=tk.X, padx=5, pady=(5, 0))
+        self.canvas.bind('<Configure>', lambda e: self.draw())
+    
+    def show(self, histogram):
+        """Show a (4, 256) histogram from compute_histogram, or nothing for None."""
+        self.histogram = histogram
+        self.draw()
+    
+    def draw(self):
+        """Draw the current histogram to fit the canvas."""
+        self.canvas.delete("all")
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        if self.histogram is None or width <= 1 or height <= 1:
+            return
+        
+        # Scale to the tallest bin, ignoring clipped ends that would flatten the rest
+        peak = max(1, int(self.histogram[:, 1:255].max()))
+        x = np.linspace(0, width - 1, 256)
+        curves = CURVES
+        if (self.histogram[:3] == self.histogram[3]).all():
+            # Grey image: the colour curves would all hide the luminance
+            curves = CURVES[:1]
+        for row, color in curves:
+            y = (height - 1) - np.minimum(self.histogram[row] / peak, 1.0) * (height - 2)
+            points = np.column_stack([x, y]).ravel().tolist()
+            self.canvas.create_line(*points, fill=color)
+    
+    def clear(self):
+        """Remove the histogram."""
+        self.show(None)
@@ -28,6 +28,20 @@ class MenuBar:
             accelerator="Ctrl+Shift+S",
         )
         file_menu.add_separator()
+        file_menu.add_command(
+            label="Previous Image", command=self.callbacks["previous_image"], accelerator="PgUp"
+        )
+        file_menu.add_command(
+            label="Next Image", command=self.callbacks["next_image"], accelerator="PgDn"
+        )
+        file_menu.add_separator()
+        file_menu.add_command(
+            label="Apply Recipe...", command=self.callbacks["apply_recipe"]
+        )
+        file_menu.add_command(
+            label="Export Recipe...", command=self.callbacks["export_recipe"]
+        )
+        file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
         menubar.add_cascade(label="File", menu=file_menu)
 
@@ -41,7 +55,26 @@ class MenuBar:
         )
         menubar.add_cascade(label="Edit", menu=edit_menu)
 
+        # View menu
+        view_menu = tk.Menu(menubar, tearoff=0)
+        view_menu.add_command(
+            label="Zoom In", command=self.callbacks["zoom_in"], accelerator="Ctrl++"
+        )
+        view_menu.add_command(
+            label="Zoom Out", command=self.callbacks["zoom_out"], accelerator="Ctrl+-"
+        )
+        view_menu.add_separator()
+        view_menu.add_command(
+            label="Fit to Window", command=self.callbacks["zoom_fit"], accelerator="Ctrl+0"
+        )
+        view_menu.add_command(
+            label="Actual Size", command=self.callbacks["zoom_actual"], accelerator="Ctrl+1"
+        )
+        menubar.add_cascade(label="View", menu=view_menu)
+
         # Help menu
         help_menu = tk.Menu(menubar, tearoff=0)
+        help_menu.add_command(label="Export Trace...", command=self.callbacks["export_trace"])
+        help_menu.add_separator()
         help_menu.add_command(label="About", command=self.callbacks["about"])
         menubar.add_cascade(label="Help", menu=help_menu)
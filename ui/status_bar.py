@@ -1,5 +1,6 @@
 import tkinter as tk
 from config.config import settings
+from utils.formatting import format_bytes
 
 
 class StatusBar:
@@ -39,6 +40,26 @@ class StatusBar:
             padx=10
         )
         self.right_label.pack(side=tk.RIGHT)
+        
+        self.history_label = tk.Label(
+            status_frame,
+            text="",
+            bg=settings.colors.status_bar_background,
+            fg=settings.colors.status_bar_foreground,
+            anchor=tk.E,
+            padx=10
+        )
+        self.history_label.pack(side=tk.RIGHT)
+        
+        self.latency_label = tk.Label(
+            status_frame,
+            text="",
+            bg=settings.colors.status_bar_background,
+            fg=settings.colors.status_bar_foreground,
+            anchor=tk.E,
+            padx=10
+        )
+        self.latency_label.pack(side=tk.RIGHT)
     
     def update(self, text):
         """Update status bar text."""
@@ -50,7 +71,21 @@ class StatusBar:
         # Auto-clear after 3 seconds
         self.parent.after(3000, lambda: self.right_label.config(text=""))
     
+    def show_progress(self, text):
+        """Show progress of a background task on the right side until cleared."""
+        self.right_label.config(text=text)
+    
+    def show_latency(self, text):
+        """Show the time breakdown of the last operation."""
+        self.latency_label.config(text=text)
+    
+    def show_history_size(self, num_bytes):
+        """Show the memory used by undo/redo history."""
+        self.history_label.config(text=f"History: {format_bytes(num_bytes)}")
+    
     def clear(self):
         """Clear status bar text."""
         self.status_label.config(text="")
-        self.right_label.config(text="")
\ No newline at end of file
+        self.right_label.config(text="")
+        self.history_label.config(text="")
+        self.latency_label.config(text="")
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""File IO: Atomic image writes with configurable encoder profiles."""
+
+import os
+import shutil
+from PIL import Image
+from config.config import settings
+from utils.image_converter import array_to_pil
+
+
+# Working modes a format cannot store, and the mode they are saved in instead
+UNSUPPORTED_MODES = {
+    "JPEG": {"LA": "L", "RGBA": "RGB"},
+    "BMP": {"LA": "RGBA"},
+}
+
+
+def supported_extensions():
+    """Lower-case extensions of the formats the editor opens."""
+    patterns = settings.file_types.supported_formats[0][1].split()
+    return {pattern.lstrip("*").lower() for pattern in patterns}
+
+
+def encoder_options(image_format, profile=None):
+    """
+    Pillow save() options of an encoder profile for image_format.
+
+    profile is a name from settings.encoder.profiles, by default
+    settings.encoder.profile. Formats a profile does not list use Pillow's
+    defaults. Raises ValueError for an unknown profile.
+    """
+    name = profile or settings.encoder.profile
+    profiles = settings.encoder.profiles
+    if name not in profiles:
+        raise ValueError(f"Unknown encoder profile '{name}' (choose from {', '.join(profiles)})")
+    return dict(profiles[name].get(image_format.lower(), {}))
+
+
+def image_format_for(path):
+    """Pillow format name for the extension of path; raises ValueError if unknown."""
+    image_format = Image.registered_extensions().get(os.path.splitext(path)[1].lower())
+    if image_format is None:
+        raise ValueError(f"Unknown image format for {os.path.basename(path)}")
+    return image_format
+
+
+class ProgressWriter:
+    """
+    File wrapper that reports the bytes written so far to progress().
+
+    It hides fileno() so Pillow encodes in chunks through write() instead
+    of handing the descriptor to the encoder.
+    """
+
+    def __init__(self, file, progress):
+        self.file = file
+        self.progress = progress
+        self.written = 0
+
+    def write(self, data):
+        count = self.file.write(data)
+        self.written += len(data)
+        self.progress(self.written)
+        return count
+
+    def __getattr__(self, name):
+        if name == "fileno":
+            raise AttributeError(name)
+        return getattr(self.file, name)
+
+
+def encodable(pil_image, image_format):
+    """pil_image in a mode image_format can store, dropping alpha if it has to."""
+    mode = UNSUPPORTED_MODES.get(image_format, {}).get(pil_image.mode)
+    if mode is None:
+        return pil_image
+    return pil_image.convert(mode)
+
+
+def save_atomic(image, destination, progress=None, profile=None):
+    """
+    Save image to a temporary file beside destination, then rename it.
+
+    destination is replaced only once the new file is complete, so a
+    failed or interrupted save leaves any existing file untouched, and a
+    replaced file keeps its permission bits. progress(bytes_written) is called as the encoder writes. The encoder
+    options come from the named profile (see encoder_options).
+    """
+    directory, name = os.path.split(destination)
+    image_format = image_format_for(name)
+    options = encoder_options(image_format, profile)
+    os.makedirs(directory or ".", exist_ok=True)
+
+    temporary = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    try:
+        with open(temporary, "wb") as file:
+            target = ProgressWriter(file, progress) if progress else file
+            encodable(array_to_pil(image), image_format).save(target, format=image_format, **options)
+            file.flush()
+            os.fsync(file.fileno())
+        # The temporary file has default permissions; keep the old file's
+        if os.path.exists(destination):
+            shutil.copymode(destination, temporary)
+        os.replace(temporary, destination)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
@@ -1,24 +1,90 @@
-import cv2
 import numpy as np
 from PIL import Image
+from utils.tracing import span
 
 
-def pil_to_cv2(pil_image):
-    """Convert PIL Image to OpenCV format (BGR)."""
-    rgb_array = np.array(pil_image)
-    bgr_array = cv2.cvtColor(rgb_array, cv2.COLOR_RGB2BGR)
-    return bgr_array
+# Working representation: C-contiguous uint8 array in one of WORKING_MODES,
+# shaped (height, width) for L and (height, width, channels) otherwise.
+# Alpha, when there is one, is the last channel and is not premultiplied.
+# PIL images only appear at file I/O and the Tk display.
+WORKING_MODES = ("L", "LA", "RGB", "RGBA")
+CHANNEL_MODES = {1: "L", 2: "LA", 3: "RGB", 4: "RGBA"}
+# Modes that are grey already, kept grey rather than expanded to RGB
+GRAY_SOURCE_MODES = ("1", "L", "I", "I;16", "I;16L", "I;16B", "I;16N", "F")
 
 
-def cv2_to_pil(cv2_image):
-    """Convert OpenCV image (BGR) to PIL Image format."""
-    rgb_array = cv2.cvtColor(cv2_image, cv2.COLOR_BGR2RGB)
-    pil_image = Image.fromarray(rgb_array)
-    return pil_image
+def pil_to_array(pil_image):
+    """Convert PIL Image to a working array, keeping grey and alpha."""
+    with span("pil_to_array", "convert"):
+        return np.ascontiguousarray(np.asarray(ensure_working(pil_image)))
 
 
-def ensure_rgb(image):
-    """Ensure image is in RGB mode."""
-    if image.mode != 'RGB':
-        return image.convert('RGB')
-    return image
\ No newline at end of file
+def array_to_pil(array):
+    """Convert a working array to PIL Image format."""
+    with span("array_to_pil", "convert"):
+        return Image.fromarray(array)
+
+
+def freeze(array):
+    """Mark an array read-only so it can be shared without copying."""
+    array.flags.writeable = False
+    return array
+
+
+def image_size(array):
+    """Return (width, height) of a working array."""
+    return array.shape[1], array.shape[0]
+
+
+def image_mode(array):
+    """The working mode of an array, from its channel count."""
+    return CHANNEL_MODES[1 if array.ndim == 2 else array.shape[2]]
+
+
+def has_alpha(array):
+    """Check if a working array has an alpha channel"""
+    return array.ndim == 3 and array.shape[2] in (2, 4)
+
+
+def split_alpha(array):
+    """(colour, alpha) views of a working array; alpha is None without one."""
+    if not has_alpha(array):
+        return array, None
+    if array.shape[2] == 2:
+        return array[:, :, 0], array[:, :, 1]
+    return array[:, :, :3], array[:, :, 3]
+
+
+def merge_alpha(color, alpha, out=None):
+    """Append alpha to a grey or RGB array; color itself when alpha is None."""
+    if alpha is None:
+        return color
+    channels = 1 if color.ndim == 2 else color.shape[2]
+    if out is None:
+        out = np.empty(color.shape[:2] + (channels + 1,), dtype=color.dtype)
+    out[:, :, :channels] = color.reshape(color.shape[:2] + (channels,))
+    out[:, :, channels] = alpha
+    return out
+
+
+def working_mode(image):
+    """The working mode a PIL image is decoded to."""
+    alpha = image.mode in ("LA", "La", "PA", "RGBA", "RGBa") or (image.mode == "P" and "transparency" in image.info)
+    if image.mode in GRAY_SOURCE_MODES or image.mode in ("LA", "La"):
+        return "LA" if alpha else "L"
+    return "RGBA" if alpha else "RGB"
+
+
+def working_shape(image):
+    """Shape of the working array a PIL image is decoded to."""
+    width, height = image.size
+    channels = len(working_mode(image))
+    return (height, width) if channels == 1 else (height, width, channels)
+
+
+def ensure_working(image):
+    """Ensure image is in its working mode."""
+    mode = working_mode(image)
+    if image.mode != mode:
+        return image.convert(mode)
+    return image
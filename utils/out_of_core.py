@@ -0,0 +1,65 @@
+import tempfile
+import numpy as np
+from config.config import settings
+from utils.image_converter import working_mode, working_shape
+
+
+# Images above performance.out_of_core_pixels live in memory-mapped scratch
+# files instead of RAM. A scratch file is unlinked as soon as it is created,
+# so the disk space is returned once the last array using it is gone.
+
+
+def is_large(width, height):
+    """Check if an image of this size should be kept out of core."""
+    limit = settings.performance.out_of_core_pixels
+    return bool(limit) and width * height >= limit
+
+
+def is_mapped(array):
+    """Check if array lives in a scratch file rather than in RAM."""
+    return isinstance(array, np.memmap)
+
+
+def scratch_array(shape, dtype=np.uint8):
+    """Allocate a writable array backed by an anonymous scratch file."""
+    scratch = tempfile.TemporaryFile(dir=settings.performance.scratch_dir or None)
+    return np.memmap(scratch, dtype=dtype, mode="w+", shape=tuple(shape))
+
+
+def output_for(image, shape, dtype=np.uint8):
+    """
+    Destination array for an operation on image with the given output shape.
+
+    Returns a scratch array when image is mapped, so OpenCV writes its result
+    straight to disk through the dst argument, and None otherwise to let
+    OpenCV allocate in RAM as usual.
+    """
+    if is_mapped(image):
+        return scratch_array(shape, dtype)
+    return None
+
+
+def decode_to_scratch(pil_image, progress=None):
+    """
+    Decode a PIL image into a working scratch array, band by band.
+
+    Pillow still has to decode compressed formats in one piece, but the
+    conversion to the working mode and the copy into the working array go one band of rows at
+    a time, so the full frame is never held twice. progress(fraction) is
+    called after every band.
+    """
+    width, height = pil_image.size
+    mode = working_mode(pil_image)
+    array = scratch_array(working_shape(pil_image))
+    band = settings.performance.tile_size
+    pil_image.load()
+    for top in range(0, height, band):
+        bottom = min(top + band, height)
+        rows = pil_image.crop((0, top, width, bottom))
+        if rows.mode != mode:
+            rows = rows.convert(mode)
+        array[top:bottom] = np.asarray(rows)
+        if progress:
+            progress(bottom / height)
+    pil_image.close()
+    return array
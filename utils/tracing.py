@@ -0,0 +1,121 @@
+"""Tracing: Timed spans of editor work, exportable as a Chrome trace."""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from config.config import settings
+
+
+class Span:
+    """One timed piece of work and the spans started inside it."""
+
+    __slots__ = ("name", "category", "args", "start", "duration", "allocated", "thread", "children")
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0  # perf_counter_ns
+        self.duration = 0  # ns
+        self.allocated = None  # net bytes allocated, None without tracemalloc
+        self.thread = threading.get_ident()
+        self.children = []
+
+    def to_event(self, pid):
+        """Chrome trace "complete" event for the span."""
+        args = dict(self.args)
+        if self.allocated is not None:
+            args["allocated_bytes"] = self.allocated
+        return {
+            "name": self.name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": self.start / 1000,
+            "dur": self.duration / 1000,
+            "pid": pid,
+            "tid": self.thread,
+            "args": args,
+        }
+
+
+class Tracer:
+    """
+    Records spans while settings.tracing.enabled is set.
+
+    Spans nest per thread. The most recent top-level span of category
+    "operation" is kept as last_operation for a latency breakdown. When
+    tracing.track_allocations is set, tracemalloc runs and every span
+    records the bytes it allocated and still held at its end; this slows
+    allocation down noticeably.
+    """
+
+    def __init__(self):
+        self.enabled = settings.tracing.enabled
+        self.spans = deque(maxlen=settings.tracing.max_spans)
+        self.last_operation = None
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        if self.enabled and settings.tracing.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def span(self, name, category="editor", **args):
+        """Context manager timing the work inside it; does nothing while disabled."""
+        if not self.enabled:
+            return nullcontext()
+        return self.record(Span(name, category, args))
+
+    @contextmanager
+    def record(self, span):
+        """Time span and attach it to the span it was started in."""
+        stack = self.local.__dict__.setdefault("stack", [])
+        tracing_memory = tracemalloc.is_tracing()
+        before = tracemalloc.get_traced_memory()[0] if tracing_memory else 0
+        stack.append(span)
+        span.start = time.perf_counter_ns()
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter_ns() - span.start
+            if tracing_memory:
+                span.allocated = tracemalloc.get_traced_memory()[0] - before
+            stack.pop()
+            if stack:
+                stack[-1].children.append(span)
+            elif span.category == "operation":
+                self.last_operation = span
+            with self.lock:
+                self.spans.append(span)
+
+    def export(self, path):
+        """Write the recorded spans as Chrome/Perfetto trace JSON."""
+        pid = os.getpid()
+        with self.lock:
+            events = [span.to_event(pid) for span in self.spans]
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+        return len(events)
+
+    def clear(self):
+        """Forget recorded spans."""
+        with self.lock:
+            self.spans.clear()
+        self.last_operation = None
+
+
+def breakdown(span):
+    """Short text of span's duration split over the spans inside it."""
+    text = f"{span.name} {span.duration / 1e6:.0f} ms"
+    if span.children:
+        parts = {}
+        for child in span.children:
+            parts[child.name] = parts.get(child.name, 0) + child.duration
+        text += ": " + ", ".join(f"{name} {duration / 1e6:.0f}" for name, duration in parts.items())
+    return text
+
+
+TRACER = Tracer()
+span = TRACER.span
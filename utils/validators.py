@@ -1,3 +1,5 @@
+from config.config import settings
+
 
 def validate_dimensions(width, height):
     """Validate image dimensions."""
@@ -8,8 +10,10 @@ def validate_dimensions(width, height):
         if w <= 0 or h <= 0:
             return False, "Dimensions must be positive numbers"
         
-        if w > 10000 or h > 10000:
-            return False, "Dimensions too large (max 10000px)"
+        # Filters run in tiles, so the limit is only a sanity bound
+        max_dimension = settings.performance.max_dimension
+        if w > max_dimension or h > max_dimension:
+            return False, f"Dimensions too large (max {max_dimension}px)"
         
         return True, None
     
@@ -21,8 +25,9 @@ def validate_blur_intensity(intensity):
     """Validate blur intensity slider input."""
     try:
         value = int(intensity)
-        # Clamp to 0-15; 0 means no blur
-        value = max(0, min(15, value))
+        # Clamp to the slider range; 0 means no blur
+        value = max(settings.image_processing.min_blur_intensity, value)
+        value = min(settings.image_processing.max_blur_intensity, value)
         return value
     except (ValueError, TypeError):
         return 0  # Default to 0 blur on invalid input